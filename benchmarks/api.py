@@ -0,0 +1,334 @@
+# benchmarks/api.py
+"""Throughput and latency of the API hot paths, end to end in process.
+
+Seeds users, posts and likes, then drives the ASGI app through httpx
+(no network) for each scenario: login, token refresh, ``get_current_user``
+(``GET /v1/me``), the ``GET /v1/blog`` list, a single post read and
+like/unlike.
+Results are JSON; pass ``--baseline`` with an earlier result file to fail
+(exit status 1) when a scenario's p50 regressed beyond ``--tolerance``.
+
+    python -m benchmarks.api --output results.json
+    python -m benchmarks.api --baseline results.json
+    python -m benchmarks.api --url "mysql+aiomysql://user:pw@host/db" \\
+        --reset-database
+
+Against ``--url`` every table is dropped and recreated, hence the
+required ``--reset-database``. Login cost follows ``BCRYPT_ROUNDS``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import insert
+
+from src import database, ratelimit
+from src.auth import get_password_hash
+from src.database import Base
+from src.main import create_app
+from src.models import Category, Like, Post, SubCategory, User
+from src.settings import Settings
+
+PASSWORD = "benchmark-password"
+SCENARIOS = (
+    "login", "refresh", "current_user", "list", "read", "like_unlike",
+)
+
+
+async def seed(users: int, posts: int, likes: int, rng) -> None:
+    async with database.get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        # One hash for everybody; hashing each user would dominate seeding
+        password = get_password_hash(PASSWORD)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "name": f"User {i}",
+                    "email": f"user{i}@example.com",
+                    "password": password,
+                }
+                for i in range(1, users + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Category), [{"id": i, "name": f"C{i}"} for i in (1, 2)]
+        )
+        await conn.execute(
+            insert(SubCategory),
+            [{"id": i, "name": f"S{i}", "category_id": i} for i in (1, 2)],
+        )
+        rows = []
+        for i in range(1, posts + 1):
+            category_id = rng.choice((1, 2))
+            rows.append(
+                {
+                    "id": i,
+                    "title": f"Post {i}",
+                    "description": "A short description of the post",
+                    "content": "Lorem ipsum dolor sit amet. " * 40,
+                    "is_public": rng.random() < 0.9,
+                    "owner_id": rng.randint(1, users),
+                    "category_id": category_id,
+                    "sub_category_id": category_id,
+                }
+            )
+            if len(rows) == 1000:
+                await conn.execute(insert(Post), rows)
+                rows = []
+        if rows:
+            await conn.execute(insert(Post), rows)
+        pairs = {
+            (rng.randint(1, posts), rng.randint(1, users))
+            for _ in range(likes)
+        }
+        if pairs:
+            await conn.execute(
+                insert(Like),
+                [{"post_id": p, "user_id": u} for p, u in sorted(pairs)],
+            )
+        await conn.exec_driver_sql(
+            "UPDATE posts SET like_count = "
+            "(SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+        )
+
+
+def summarize(timings: list[float], errors: int, wall: float) -> dict:
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput_rps": round(len(timings) / wall, 1),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p99_ms": round(
+            timings[max(0, int(len(timings) * 0.99) - 1)] * 1000, 3
+        ),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+    }
+
+
+async def drive(client, requests: int, concurrency: int, make_call) -> dict:
+    """Run ``requests`` calls of ``make_call(i)`` over ``concurrency``
+    workers; each call returns the responses it produced."""
+    timings, errors = [], 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            start = time.perf_counter()
+            responses = await make_call(i)
+            timings.append(time.perf_counter() - start)
+            errors += sum(1 for r in responses if r.status_code >= 400)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(timings, errors, time.perf_counter() - start)
+
+
+async def run_async(
+    url: str,
+    users: int,
+    posts: int,
+    likes: int,
+    requests: int,
+    concurrency: int,
+    seed_value: int,
+) -> dict:
+    rng = random.Random(seed_value)
+    # Every request comes from one client, which login throttling would
+    # turn away; benchmarks.ratelimit measures the limiter itself
+    ratelimit.RATE_LIMIT_ENABLED = False
+    # Seeding drops every table, so nothing is left to resume
+    app = create_app(Settings(database_url=url, resume_account_purges=False))
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        await seed(users, posts, likes, rng)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+
+            async def login(user_id: int):
+                return await client.post(
+                    "/v1/accounts/login",
+                    data={
+                        "username": f"user{user_id}@example.com",
+                        "password": PASSWORD,
+                    },
+                )
+
+            tokens = {}
+            # Refresh tokens are single-use: each call takes one and puts
+            # back the one it was rotated to
+            refresh_tokens = asyncio.Queue()
+            for user_id in range(1, min(users, concurrency * 4) + 1):
+                body = (await login(user_id)).json()
+                tokens[user_id] = {
+                    "Authorization": f"Bearer {body['access_token']}"
+                }
+                refresh_tokens.put_nowait(body["refresh_token"])
+
+            def headers(i: int) -> dict:
+                return tokens[i % len(tokens) + 1]
+
+            async def login_call(i):
+                return [await login(rng.randint(1, users))]
+
+            async def refresh_call(i):
+                res = await client.post(
+                    "/v1/accounts/refresh",
+                    json={"refresh_token": await refresh_tokens.get()},
+                )
+                refresh_tokens.put_nowait(res.json().get("refresh_token"))
+                return [res]
+
+            async def current_user_call(i):
+                return [await client.get("/v1/me", headers=headers(i))]
+
+            async def list_call(i):
+                params = {"limit": 20}
+                if i % 2:
+                    params["category_id"] = rng.choice((1, 2))
+                return [
+                    await client.get(
+                        "/v1/blog", params=params, headers=headers(i)
+                    )
+                ]
+
+            async def read_call(i):
+                # Private posts of other users answer 403; that is a
+                # legitimate outcome here, so only 5xx counts as an error
+                res = await client.get(
+                    f"/v1/blog/{rng.randint(1, posts)}", headers=headers(i)
+                )
+                return [res] if res.status_code >= 500 else []
+
+            async def like_unlike_call(i):
+                post_id = rng.randint(1, posts)
+                liked = await client.post(
+                    f"/v1/like/{post_id}", headers=headers(i)
+                )
+                unliked = await client.delete(
+                    f"/v1/like/{post_id}", headers=headers(i)
+                )
+                # 400/403 mean "already liked"/"private": still a full
+                # round trip through the endpoint
+                return [r for r in (liked, unliked) if r.status_code >= 500]
+
+            calls = {
+                "login": login_call,
+                "refresh": refresh_call,
+                "current_user": current_user_call,
+                "list": list_call,
+                "read": read_call,
+                "like_unlike": like_unlike_call,
+            }
+            # Login is bcrypt-bound; fewer calls keep the run short
+            results = {}
+            for name in SCENARIOS:
+                count = max(1, requests // 10) if name == "login" else requests
+                results[name] = await drive(
+                    client, count, concurrency, calls[name]
+                )
+        dialect = database.get_engine().dialect.name
+    return {
+        "benchmark": "api",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "dialect": dialect,
+        "config": {
+            "users": users,
+            "posts": posts,
+            "likes": likes,
+            "requests": requests,
+            "concurrency": concurrency,
+            "seed": seed_value,
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p50 is more than ``tolerance`` slower than before."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        ratio = current["p50_ms"] / previous["p50_ms"]
+        current["p50_vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def run(url: str = None, **options) -> dict:
+    if url:
+        return asyncio.run(run_async(url, **options))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        return asyncio.run(
+            run_async(f"sqlite+aiosqlite:///{path}", **options)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url", help="async database URL (default: a temporary SQLite file)"
+    )
+    parser.add_argument(
+        "--reset-database",
+        action="store_true",
+        help="confirm that every table at --url may be dropped",
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--likes", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON here")
+    parser.add_argument("--baseline", help="earlier results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.url and not args.reset_database:
+        parser.error("--url drops all tables; add --reset-database")
+
+    results = run(
+        args.url,
+        users=args.users,
+        posts=args.posts,
+        likes=args.likes,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        seed_value=args.seed,
+    )
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/ratelimit.py
+"""Per-request cost of the token-bucket rate limiter.
+
+``take_*`` time the in-memory backend alone: one hot bucket, and a fresh
+key per call (which also exercises LRU eviction). ``request_*`` compare
+``GET /v1/health/db-pool`` through the whole app in process with every
+limit off and with a per-route limit high enough never to trigger.
+
+    python -m benchmarks.ratelimit --calls 100000 --requests 4000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from src import ratelimit
+from src.main import create_app
+from src.ratelimit import InMemoryRateLimitBackend, Rate
+from src.settings import Settings
+
+UNREACHABLE = Rate(10**9, 1)
+
+
+async def time_takes(calls: int, distinct_keys: bool) -> float:
+    backend = InMemoryRateLimitBackend(max_size=calls // 2 or 1)
+    keys = [f"ip:{i}" if distinct_keys else "ip:hot" for i in range(calls)]
+    start = time.perf_counter()
+    for key in keys:
+        await backend.take(key, UNREACHABLE)
+    return (time.perf_counter() - start) / calls
+
+
+async def time_requests(path: str, requests: int, rounds: int) -> dict:
+    # Alternate blocks of requests with limits off and on in one app, so
+    # warm-up and drift affect both modes alike
+    ratelimit.RATE_LIMIT_PER_ROUTE = UNREACHABLE
+    app = create_app(
+        Settings(
+            database_url=f"sqlite+aiosqlite:///{path}",
+            resume_account_purges=False,
+        )
+    )
+    timings = {False: [], True: []}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for _ in range(50):  # warm up
+                await client.get("/v1/health/db-pool")
+            for _ in range(rounds):
+                for enabled in (False, True):
+                    ratelimit.RATE_LIMIT_ENABLED = enabled
+                    for _ in range(requests // rounds):
+                        start = time.perf_counter()
+                        await client.get("/v1/health/db-pool")
+                        timings[enabled].append(time.perf_counter() - start)
+    return {
+        "limits_off_p50_us": round(statistics.median(timings[False]) * 1e6, 1),
+        "limits_on_p50_us": round(statistics.median(timings[True]) * 1e6, 1),
+    }
+
+
+async def run_async(calls: int, requests: int, rounds: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ratelimit.db")
+        request_timings = await time_requests(path, requests, rounds)
+    return {
+        "benchmark": "ratelimit",
+        "calls": calls,
+        "requests": requests,
+        "take_hot_key_us": round(await time_takes(calls, False) * 1e6, 3),
+        "take_distinct_keys_us": round(
+            await time_takes(calls, True) * 1e6, 3
+        ),
+        **request_timings,
+        "request_overhead_p50_us": round(
+            request_timings["limits_on_p50_us"]
+            - request_timings["limits_off_p50_us"],
+            1,
+        ),
+    }
+
+
+def run(calls: int = 100000, requests: int = 4000, rounds: int = 10) -> dict:
+    return asyncio.run(run_async(calls, requests, rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    print(
+        json.dumps(run(args.calls, args.requests, args.rounds), indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/serialization.py
+"""Per-item cost of turning a page of posts into response bytes.
+
+Compares the original list path (ORM entities, ``__dict__`` copies,
+``response_model`` validation and ``jsonable_encoder``) with the column
+rows dumped straight to JSON by ``get_all_blogs``.
+
+    python -m benchmarks.serialization --items 1000 --repeat 5
+"""
+import argparse
+import json
+import time
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.database import Base
+from src.models import Category, Post, SubCategory, User
+from src.schemas import PostGetResponse
+
+legacy_adapter = TypeAdapter(list[PostGetResponse])
+fast_adapter = TypeAdapter(list[dict[str, Any]])
+
+
+def seed(session: Session, items: int) -> None:
+    session.add(
+        User(id=1, name="Bench", email="bench@example.com", password="x")
+    )
+    session.add(Category(id=1, name="Tech"))
+    session.add(SubCategory(id=1, name="Python", category_id=1))
+    session.add_all(
+        Post(
+            title=f"Post {i}",
+            description="A short description of the post",
+            content="Lorem ipsum dolor sit amet. " * 40,
+            owner_id=1,
+            category_id=1,
+            sub_category_id=1,
+        )
+        for i in range(items)
+    )
+    session.commit()
+
+
+def legacy(session: Session) -> bytes:
+    rows = (
+        session.query(
+            Post,
+            Category.name.label("category_name"),
+            SubCategory.name.label("sub_category_name"),
+        )
+        .outerjoin(Category, Category.id == Post.category_id)
+        .outerjoin(SubCategory, SubCategory.id == Post.sub_category_id)
+        .all()
+    )
+    response = []
+    for post, category_name, sub_category_name in rows:
+        item = post.__dict__.copy()
+        del item["_sa_instance_state"]
+        item["category_name"] = category_name
+        item["sub_category_name"] = sub_category_name
+        response.append(item)
+    validated = legacy_adapter.validate_python(response)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast(session: Session) -> bytes:
+    fields = [c for c in PostGetResponse.model_fields if c != "liked_by_me"]
+    columns = [getattr(Post, f) for f in fields if hasattr(Post, f)]
+    rows = session.execute(
+        select(
+            *columns,
+            Category.name.label("category_name"),
+            SubCategory.name.label("sub_category_name"),
+        )
+        .outerjoin(Category, Category.id == Post.category_id)
+        .outerjoin(SubCategory, SubCategory.id == Post.sub_category_id)
+    ).all()
+    items = [{f: row._mapping[f] for f in fields} for row in rows]
+    return fast_adapter.dump_json(items)
+
+
+def measure(fn, session: Session, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        session.expunge_all()
+        start = time.perf_counter()
+        fn(session)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(items: int = 1000, repeat: int = 5) -> dict:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, items)
+        legacy_seconds = measure(legacy, session, repeat)
+        fast_seconds = measure(fast, session, repeat)
+    engine.dispose()
+    return {
+        "benchmark": "serialization",
+        "items": items,
+        "legacy_us_per_item": round(legacy_seconds / items * 1e6, 2),
+        "fast_us_per_item": round(fast_seconds / items * 1e6, 2),
+        "speedup": round(legacy_seconds / fast_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/startup.py
+"""Cold-start cost of a worker, measured in fresh interpreters.
+
+``lazy`` is what a worker pays now: importing ``src.main`` and running the
+lifespan startup. ``eager`` adds what used to happen at import: creating
+the engines and running ``create_all`` against the database.
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+LAZY = """
+import asyncio, time
+start = time.perf_counter()
+from src.main import create_app
+from src.settings import Settings
+imported = time.perf_counter()
+
+async def start_app():
+    app = create_app(
+        Settings(
+            database_url="sqlite+aiosqlite:///{path}",
+            resume_account_purges=False,
+        )
+    )
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(start_app())
+print(imported - start, ready - start)
+"""
+
+EAGER = """
+import time
+start = time.perf_counter()
+from sqlalchemy import create_engine
+from src.main import app
+from src.database import Base, init_engine
+init_engine("sqlite+aiosqlite:///{path}")
+engine = create_engine("sqlite:///{path}")
+Base.metadata.create_all(bind=engine)
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, path: str, repeat: int) -> list[list[float]]:
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", textwrap.dedent(code.format(path=path))],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append([float(value) for value in output.split()])
+    return samples
+
+
+def median_ms(samples: list[list[float]], index: int) -> float:
+    return round(statistics.median(s[index] for s in samples) * 1000, 1)
+
+
+def run(repeat: int = 5) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/startup.db"
+        lazy = measure(LAZY, path, repeat)
+        eager = measure(EAGER, path, repeat)
+    return {
+        "benchmark": "startup",
+        "repeat": repeat,
+        "lazy_import_ms": median_ms(lazy, 0),
+        "lazy_ready_ms": median_ms(lazy, 1),
+        "eager_import_ms": median_ms(eager, 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
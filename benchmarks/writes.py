@@ -0,0 +1,130 @@
+# benchmarks/writes.py
+"""Latency of a single post INSERT as the write handlers issue it.
+
+Compares the original path (``expire_on_commit`` left on, then
+``db.refresh`` to reload the row) with the current one, where generated
+values come back with the INSERT and nothing is read after the commit.
+
+    python -m benchmarks.writes --writes 500
+    python -m benchmarks.writes --url "mysql+aiomysql://user:pw@host/db"
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database import Base
+from src.models import Category, Post, SubCategory, User
+
+
+async def seed(sessionmaker) -> None:
+    async with sessionmaker() as session:
+        session.add(
+            User(id=1, name="Bench", email="bench@example.com", password="x")
+        )
+        session.add(Category(id=1, name="Tech"))
+        session.add(SubCategory(id=1, name="Python", category_id=1))
+        await session.commit()
+
+
+def new_post(i: int) -> Post:
+    return Post(
+        title=f"Post {i}",
+        description="A short description of the post",
+        content="Lorem ipsum dolor sit amet. " * 40,
+        owner_id=1,
+        category_id=1,
+        sub_category_id=1,
+    )
+
+
+async def refresh_write(sessionmaker, i: int) -> dict:
+    async with sessionmaker(expire_on_commit=True) as session:
+        post = new_post(i)
+        session.add(post)
+        await session.commit()
+        await session.refresh(post)
+        return {"id": post.id, "created_at": post.created_at}
+
+
+async def returning_write(sessionmaker, i: int) -> dict:
+    async with sessionmaker() as session:
+        post = new_post(i)
+        session.add(post)
+        await session.commit()
+        return {"id": post.id, "created_at": post.created_at}
+
+
+async def measure(fn, sessionmaker, statements: list, writes: int) -> dict:
+    timings = []
+    statements.clear()
+    for i in range(writes):
+        start = time.perf_counter()
+        await fn(sessionmaker, i)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_us": round(statistics.median(timings) * 1e6, 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1] * 1e6, 1),
+        "statements_per_write": round(len(statements) / writes, 2),
+    }
+
+
+async def run_async(url: str, writes: int) -> dict:
+    engine = create_async_engine(url)
+    sessionmaker = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(sessionmaker)
+    # Warm the pool and statement caches before timing anything
+    await returning_write(sessionmaker, -1)
+    refresh = await measure(refresh_write, sessionmaker, statements, writes)
+    returning = await measure(
+        returning_write, sessionmaker, statements, writes
+    )
+    await engine.dispose()
+    return {
+        "benchmark": "writes",
+        "dialect": engine.dialect.name,
+        "writes": writes,
+        "refresh": refresh,
+        "returning": returning,
+        "p50_speedup": round(refresh["p50_us"] / returning["p50_us"], 2),
+    }
+
+
+def run(url: str = None, writes: int = 500) -> dict:
+    if url:
+        return asyncio.run(run_async(url, writes))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        return asyncio.run(run_async(f"sqlite+aiosqlite:///{path}", writes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url", help="async database URL (default: a temporary SQLite file)"
+    )
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.url, args.writes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
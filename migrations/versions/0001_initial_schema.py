@@ -0,0 +1,90 @@
+"""Initial schema, as create_all used to build it
+
+Databases created by the old ``create_all`` call at import are at this
+revision already: mark them with ``alembic stamp 0001`` and upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-07-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("password", sa.String(128), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+    op.create_table(
+        "sub_categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column(
+            "category_id", sa.Integer(), sa.ForeignKey("categories.id")
+        ),
+    )
+    op.create_index("ix_sub_categories_id", "sub_categories", ["id"])
+
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("content", sa.Text()),
+        sa.Column("is_public", sa.Boolean()),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column(
+            "category_id", sa.Integer(), sa.ForeignKey("categories.id")
+        ),
+        sa.Column(
+            "sub_category_id", sa.Integer(), sa.ForeignKey("sub_categories.id")
+        ),
+    )
+    op.create_index("ix_posts_id", "posts", ["id"])
+
+    op.create_table(
+        "likes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id")),
+    )
+    op.create_index("ix_likes_id", "likes", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("likes")
+    op.drop_table("posts")
+    op.drop_table("sub_categories")
+    op.drop_table("categories")
+    op.drop_table("users")
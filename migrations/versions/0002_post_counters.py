@@ -0,0 +1,70 @@
+"""Like counter, last-modified time and one like per user and post
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-07-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batch mode lets SQLite add a column with a non-constant default
+    with op.batch_alter_table("posts") as batch:
+        batch.add_column(
+            sa.Column(
+                "like_count",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+        )
+        batch.add_column(
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+            )
+        )
+    op.execute("UPDATE posts SET updated_at = created_at")
+
+    # Likes the old ORM delete detached from their user or post count for
+    # nothing and would break the cascading foreign keys of 0003
+    op.execute(
+        "DELETE FROM likes WHERE post_id IS NULL OR user_id IS NULL "
+        "OR post_id NOT IN (SELECT id FROM posts) "
+        "OR user_id NOT IN (SELECT id FROM users)"
+    )
+    # Keep the first like of any duplicates before enforcing uniqueness;
+    # the derived table lets MySQL select from the table it deletes from.
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM likes "
+        "GROUP BY post_id, user_id) AS keep)"
+    )
+    op.create_index(
+        "uq_likes_post_user", "likes", ["post_id", "user_id"], unique=True
+    )
+    op.execute(
+        "UPDATE posts SET like_count = "
+        "(SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_likes_post_user", table_name="likes")
+    with op.batch_alter_table("posts") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("like_count")
@@ -0,0 +1,70 @@
+"""Delete posts and likes together with their user or post
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-07-01 00:00:00.000000
+
+"""
+from typing import Sequence, Optional, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table) of each foreign key made to cascade
+CASCADES = (
+    ("posts", "owner_id", "users"),
+    ("likes", "user_id", "users"),
+    ("likes", "post_id", "posts"),
+)
+# SQLite foreign keys are unnamed; batch mode names them by this pattern
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def _replace_foreign_keys(table: str, ondelete: Optional[str]) -> None:
+    keys = [(c, r) for t, c, r in CASCADES if t == table]
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite can't alter a constraint: batch mode rebuilds the table
+        with op.batch_alter_table(
+            table, naming_convention=NAMING_CONVENTION
+        ) as batch:
+            for column, referred in keys:
+                name = f"fk_{table}_{column}_{referred}"
+                batch.drop_constraint(name, type_="foreignkey")
+                batch.create_foreign_key(
+                    name, referred, [column], ["id"], ondelete=ondelete
+                )
+        return
+    # MySQL generated the existing names (posts_ibfk_1, ...); look them up
+    existing = sa.inspect(op.get_bind()).get_foreign_keys(table)
+    for column, referred in keys:
+        for foreign_key in existing:
+            if foreign_key["constrained_columns"] == [column]:
+                op.drop_constraint(
+                    foreign_key["name"], table, type_="foreignkey"
+                )
+        op.create_foreign_key(
+            f"fk_{table}_{column}_{referred}",
+            table, referred, [column], ["id"],
+            ondelete=ondelete,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys("posts", "CASCADE")
+    _replace_foreign_keys("likes", "CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys("likes", None)
+    _replace_foreign_keys("posts", None)
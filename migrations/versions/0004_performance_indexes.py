@@ -0,0 +1,81 @@
+"""Indexes behind post lists, like lookups and full-text search
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-07-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keyset pagination seeks on (created_at, id), alone or behind a filter
+POST_INDEXES = {
+    "ix_posts_created": ["created_at", "id"],
+    "ix_posts_public_created": ["is_public", "created_at", "id"],
+    "ix_posts_owner_created": ["owner_id", "created_at", "id"],
+    "ix_posts_category_created": ["category_id", "created_at", "id"],
+    "ix_posts_sub_category_created": ["sub_category_id", "created_at", "id"],
+}
+
+# Copied from src/models.py at this revision; migrations must not change
+# when the models do.
+POSTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE posts_fts USING fts5("
+    "title, description, content, content='posts', content_rowid='id')",
+    "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    "END",
+    "CREATE TRIGGER posts_fts_update "
+    "AFTER UPDATE OF title, description, content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    "INSERT INTO posts_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    # Index the posts that already exist
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in POST_INDEXES.items():
+        op.create_index(name, "posts", columns)
+    op.create_index("ix_likes_user", "likes", ["user_id"])
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.create_index(
+            "ix_posts_fulltext",
+            "posts",
+            ["title", "description", "content"],
+            mysql_prefix="FULLTEXT",
+        )
+    elif dialect == "sqlite":
+        for statement in POSTS_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ix_posts_fulltext", table_name="posts")
+    elif dialect == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS posts_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
+    op.drop_index("ix_likes_user", table_name="likes")
+    for name in POST_INDEXES:
+        op.drop_index(name, table_name="posts")
@@ -0,0 +1,38 @@
+"""Mark deleted accounts whose history is still being purged
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-07-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users", sa.Column("deleted_at", sa.DateTime(timezone=True))
+    )
+    # Accounts retired before this revision only had their email replaced
+    op.execute(
+        "UPDATE users SET deleted_at = CURRENT_TIMESTAMP "
+        "WHERE email LIKE 'deleted-%@deleted.invalid'"
+    )
+    op.create_index("ix_users_deleted_at", "users", ["deleted_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_deleted_at", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("deleted_at")
@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.database import pool_stats
+from src.metrics import REQUEST_METRICS, render_histogram
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_lines() -> list[str]:
+    stats = pool_stats()
+    lines = []
+    for key in ("pool_size", "checked_out", "overflow"):
+        name = f"db_pool_{key}"
+        lines += [f"# TYPE {name} gauge", f"{name} {stats[key]}"]
+    if "wait_seconds" in stats:
+        lines += [
+            "# TYPE db_pool_checkout_timeouts_total counter",
+            f"db_pool_checkout_timeouts_total {stats['timeouts']}",
+            "# TYPE db_pool_checkout_wait_seconds histogram",
+        ]
+        lines += render_histogram(
+            "db_pool_checkout_wait_seconds", {}, stats["wait_seconds"]
+        )
+    return lines
+
+
+# Prometheus scrape target, outside the versioned API
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    lines = []
+    for metric in REQUEST_METRICS:
+        lines += metric.render()
+    lines += _pool_lines()
+    return PlainTextResponse(
+        "\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE
+    )
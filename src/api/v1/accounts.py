@@ -1,70 +1,181 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth import (
+    AuthenticatedUser,
+    decode_token,
     get_current_user,
-    create_access_token,
-    verify_password,
-    get_password_hash,
+    get_current_db_user,
+    invalidate_user,
+    is_family_revoked,
+    issue_tokens,
+    load_user,
+    oauth2_scheme,
+    revoke_family,
+    spend_refresh_token,
+    user_claims,
+    verify_password_async,
+    get_password_hash_async,
 )
-from src.database import get_db
+from src.database import get_db, update_returning
 from src.models import User
-from src.schemas import UserCreate, UserResponse
+from src.purge import delete_user, needs_purge, purge_user, retire_user
+from src.ratelimit import (
+    RATE_LIMIT_LOGIN_PER_ACCOUNT,
+    RATE_LIMIT_LOGIN_PER_IP,
+    RATE_LIMIT_REGISTER_PER_IP,
+    RateLimiter,
+)
+from src.schemas import TokenRefresh, UserCreate, UserResponse, UserUpdate
 
 router = APIRouter(prefix="/v1")
 
+# Checked before any database or bcrypt work
+login_ip_limit = RateLimiter("login:ip", RATE_LIMIT_LOGIN_PER_IP)
+login_account_limit = RateLimiter(
+    "login:account", RATE_LIMIT_LOGIN_PER_ACCOUNT
+)
+register_ip_limit = RateLimiter("register:ip", RATE_LIMIT_REGISTER_PER_IP)
+
 
 # Account Endpoints
-@router.post("/accounts", response_model=UserResponse)
-async def create_account(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+@router.post(
+    "/accounts",
+    response_model=UserResponse,
+    dependencies=[Depends(register_ip_limit)],
+)
+async def create_account(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_pw = get_password_hash(user.password)
-    new_user = User(**user.dict(exclude={"password"}), password=hashed_pw)
+    hashed_pw = await get_password_hash_async(user.password)
+    new_user = User(
+        **user.model_dump(exclude={"password"}), password=hashed_pw
+    )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return new_user
 
 
-@router.post("/accounts/login")
+@router.post("/accounts/login", dependencies=[Depends(login_ip_limit)])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+    await login_account_limit.hit(form_data.username.lower())
+    result = await db.execute(
+        select(User).where(User.email == form_data.username)
+    )
+    user = result.scalars().first()
+    if not user or not await verify_password_async(
+        form_data.password, user.password
+    ):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(data={"sub": str(user.id)})
-    return {"access_token": token, "token_type": "bearer"}
+    return issue_tokens(user_claims(user))
+
+
+@router.post("/accounts/refresh")
+async def refresh_tokens(
+    body: TokenRefresh, db: AsyncSession = Depends(get_db)
+):
+    # A signature check and two lookups in the revocation store; no bcrypt
+    payload = decode_token(body.refresh_token, "refresh")
+    if await is_family_revoked(payload["fam"]):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if not await spend_refresh_token(payload):
+        # Each refresh token works once: seeing one again means it leaked,
+        # so the whole session is ended for whoever holds it.
+        await revoke_family(payload["fam"])
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    user = await load_user(db, payload["sub"])
+    return issue_tokens(user_claims(user), family=payload["fam"])
+
+
+@router.post("/accounts/logout")
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    # Ends the session: its access token and any refresh token from it
+    payload = decode_token(token)
+    if "fam" in payload:
+        await revoke_family(payload["fam"])
+    return {"message": "Logged out"}
 
 
 @router.put("/accounts", response_model=UserResponse)
 async def update_account(
     updated: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_db_user),
 ):
     current_user.name = updated.name
     current_user.email = updated.email
-    current_user.password = get_password_hash(updated.password)
-    db.commit()
-    db.refresh(current_user)
+    current_user.password = await get_password_hash_async(updated.password)
+    await db.commit()
+    await invalidate_user(current_user.id)
     return current_user
 
 
+@router.patch("/accounts", response_model=UserResponse)
+async def patch_account(
+    updated: UserUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    changes = updated.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    # Hashing is the expensive part of an account update; skip it unless
+    # the password actually changes.
+    if "password" in changes:
+        changes["password"] = await get_password_hash_async(
+            changes["password"]
+        )
+    try:
+        row = await update_returning(
+            db,
+            update(User)
+            .where(User.id == current_user.id, User.deleted_at.is_(None))
+            .values(**changes),
+            User.id, User.name, User.email,
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    if row is None:
+        # The account was deleted (or is being) after the token was issued
+        raise HTTPException(
+            status_code=401, detail="Could not validate credentials"
+        )
+    await invalidate_user(current_user.id)
+    return row._mapping
+
+
 @router.delete("/accounts")
 async def delete_account(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    db.delete(current_user)
-    db.commit()
+    if await needs_purge(db, current_user.id):
+        # Too much history to cascade inside the request: lock the
+        # account now and delete the rest in batches after responding.
+        await retire_user(db, current_user.id)
+        background_tasks.add_task(purge_user, db, current_user.id)
+    else:
+        await delete_user(db, current_user.id)
+    await invalidate_user(current_user.id)
     return {"message": "Account deleted successfully"}
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
     return current_user
@@ -1,110 +1,612 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import os
+from datetime import datetime
+from typing import Any, Optional
 
-from src.auth import get_current_user
-from src.database import get_db
-from src.models import User, Post, Category, SubCategory
-from src.schemas import PostCreate, PostResponse, PostGetResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import (
+    delete, func, insert, literal, literal_column, select, update,
+)
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.like import get_liked_post_ids
+from src.auth import AuthenticatedUser, get_current_user, get_read_db
+from src.database import get_db, update_returning
+from src.catalog import catalog
+from src.models import Post, posts_fts
+from src.pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
+from src import response_cache
+from src.response_cache import (
+    cached_response,
+    conditional_response,
+    invalidate_posts,
+    list_generation,
+    post_key,
+    viewer_generation,
+)
+from src.schemas import (
+    PostCreate,
+    PostGetResponse,
+    PostIds,
+    PostListItem,
+    PostResponse,
+    PostUpdate,
+)
+
+# NDJSON import commits every POST_IMPORT_BATCH_SIZE rows as one multi-row
+# INSERT; export reads POST_EXPORT_BATCH_SIZE rows per server-side fetch.
+POST_IMPORT_BATCH_SIZE = int(os.getenv("POST_IMPORT_BATCH_SIZE", "500"))
+POST_IMPORT_MAX_LINE_BYTES = int(
+    os.getenv("POST_IMPORT_MAX_LINE_BYTES", str(1024 * 1024))
+)
+POST_EXPORT_BATCH_SIZE = int(os.getenv("POST_EXPORT_BATCH_SIZE", "1000"))
+# Invalid import lines are counted; only the first few are described
+MAX_IMPORT_ERRORS = 100
 
 router = APIRouter(prefix="/v1")
 
+_post_items_json = TypeAdapter(list[dict[str, Any]])
+_post_item_json = TypeAdapter(dict[str, Any])
+_EXPORT_FIELDS = (
+    "id", "title", "description", "content", "is_public", "category_id",
+    "sub_category_id", "owner_id", "created_at", "like_count",
+)
+# Projected name fields and the id columns they are resolved from
+_NAME_ID_FIELDS = {
+    "category_name": "category_id",
+    "sub_category_name": "sub_category_id",
+}
+
 
 # Blog Endpoints
 @router.post("/blog", response_model=PostResponse)
 async def create_blog(
     post: PostCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    cat_exist = (
-        db.query(Category).filter(Category.id == post.category_id).first()
+    error = await catalog.validate(
+        db, post.category_id, post.sub_category_id
     )
-    if not cat_exist:
-        raise HTTPException(
-            status_code=400, detail="Category doesn't match with id"
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    new_post = Post(**post.model_dump(), owner_id=current_user.id)
+    db.add(new_post)
+    await db.commit()
+    await invalidate_posts()
+    catalog.invalidate_tree()
+    return new_post
+
+
+@router.get(
+    "/blog",
+    response_model=list[PostListItem],
+    response_model_exclude_unset=True,
+)
+async def get_all_blogs(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    category_id: Optional[int] = None,
+    sub_category_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    # Pages are cached per viewer (private posts and liked_by_me differ)
+    # under the current list generation, which every post write replaces,
+    # and the viewer's own, which their likes replace. Other users' likes
+    # drop neither, so cached like counts can lag by up to the cache TTL.
+    query_key = sorted(request.query_params.multi_items())
+    generation = await list_generation()
+    viewer = await viewer_generation(current_user.id)
+    cache_key = (
+        f"posts:list:{generation['token']}:{viewer['token']}:"
+        f"{current_user.id}:{query_key}"
+    )
+    cached = await cached_response(db, cache_key)
+    if cached is None:
+        cached = await _load_blog_page(
+            db, current_user, cursor, limit, category_id,
+            sub_category_id, owner_id, fields,
         )
-    sub_cat_exist = (
-        db.query(SubCategory)
-        .filter(SubCategory.id == post.sub_category_id)
-        .first()
+        await response_cache.post_cache.set(cache_key, cached)
+    headers = {}
+    if cached["next_cursor"]:
+        headers["X-Next-Cursor"] = cached["next_cursor"]
+    # A page can change through any post write (including additions and
+    # deletions), so it is as new as the last one the generations record.
+    last_modified = max(
+        datetime.fromisoformat(generation["modified_at"]),
+        datetime.fromisoformat(viewer["modified_at"]),
     )
-    if not sub_cat_exist:
+    return conditional_response(
+        request, cached["content"].encode(), last_modified, headers=headers
+    )
+
+
+def _parse_fields(fields: Optional[str]) -> list[str]:
+    if not fields:
+        return list(PostListItem.model_fields)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(selected) - set(PostListItem.model_fields)
+    if unknown:
         raise HTTPException(
-            status_code=400, detail="Sub Category doesn't match with id"
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
         )
-    new_post = Post(**post.dict(), owner_id=current_user.id)
-    db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
-    return new_post
+    return selected
 
 
-@router.get("/blog", response_model=list[PostGetResponse])
-async def get_all_blogs(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+def _select_post_fields(selected: list[str]):
+    # Only the requested columns are read, plus the keyset columns needed
+    # to build the next cursor. Category names come from the catalog, so
+    # only their ids are selected and nothing is joined.
+    wanted = dict.fromkeys(
+        ["id", "created_at"] + [_NAME_ID_FIELDS.get(f, f) for f in selected]
+    )
+    return select(*(getattr(Post, f) for f in wanted if hasattr(Post, f)))
+
+
+def _filter_visible_posts(
+    query,
+    current_user: AuthenticatedUser,
+    category_id: Optional[int],
+    sub_category_id: Optional[int],
+    owner_id: Optional[int],
+):
+    query = query.where(Post.is_public | (Post.owner_id == current_user.id))
+    if category_id is not None:
+        query = query.where(Post.category_id == category_id)
+    if sub_category_id is not None:
+        query = query.where(Post.sub_category_id == sub_category_id)
+    if owner_id is not None:
+        query = query.where(Post.owner_id == owner_id)
+    return query
+
+
+async def _render_posts(
+    db: AsyncSession,
+    current_user: AuthenticatedUser,
+    rows,
+    selected: list[str],
+) -> str:
+    if "category_name" in selected or "sub_category_name" in selected:
+        await catalog.ensure_loaded(db)
+    # liked_by_me for the whole page comes from one IN (...) lookup
+    liked = set()
+    if "liked_by_me" in selected:
+        liked = await get_liked_post_ids(
+            db, current_user.id, [row.id for row in rows]
+        )
+    # Rows go straight to JSON: no ORM instances, no per-item models.
+    computed = ("liked_by_me", "category_name", "sub_category_name")
+    row_fields = [f for f in selected if f not in computed]
+    items = []
+    for row in rows:
+        values = row._mapping
+        item = {f: values[f] for f in row_fields}
+        if "liked_by_me" in selected:
+            item["liked_by_me"] = row.id in liked
+        if "category_name" in selected:
+            item["category_name"] = catalog.category_name(row.category_id)
+        if "sub_category_name" in selected:
+            item["sub_category_name"] = catalog.sub_category_name(
+                row.sub_category_id
+            )
+        items.append(item)
+    return _post_items_json.dump_json(items).decode()
+
+
+async def _load_blog_page(
+    db: AsyncSession,
+    current_user: AuthenticatedUser,
+    cursor: Optional[str],
+    limit: int,
+    category_id: Optional[int],
+    sub_category_id: Optional[int],
+    owner_id: Optional[int],
+    fields: Optional[str],
+) -> dict:
+    selected = _parse_fields(fields)
+    query = _filter_visible_posts(
+        _select_post_fields(selected),
+        current_user, category_id, sub_category_id, owner_id,
+    )
+    if cursor:
+        try:
+            last_created_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            (Post.created_at < last_created_at)
+            | ((Post.created_at == last_created_at) & (Post.id < last_id))
+        )
+
+    limit = clamp_limit(limit)
+    result = await db.execute(
+        query.order_by(Post.created_at.desc(), Post.id.desc()).limit(
+            limit + 1
+        )
+    )
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {
+        "content": await _render_posts(db, current_user, rows, selected),
+        "next_cursor": next_cursor,
+    }
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can't inject FTS5 query syntax
+    terms = q.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _search_rank(db: AsyncSession, query, q: str):
+    """Join the dialect's full-text index and return ``(query, rank)``.
+
+    Higher ranks are better matches on every backend.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        rank = mysql_match(
+            Post.title, Post.description, Post.content, against=q
+        ).in_natural_language_mode()
+        return query.where(rank > 0), rank
+    if dialect == "sqlite":
+        fts = literal_column("posts_fts")
+        rank = -func.bm25(fts)
+        query = query.join(posts_fts, posts_fts.c.rowid == Post.id).where(
+            fts.match(_fts5_query(q))
+        )
+        return query, rank
+    # No full-text index on other backends: substring scan, unranked
+    pattern = f"%{q}%"
+    rank = literal(0.0)
+    return query.where(
+        Post.title.ilike(pattern)
+        | Post.description.ilike(pattern)
+        | Post.content.ilike(pattern)
+    ), rank
+
+
+@router.get(
+    "/blog/search",
+    response_model=list[PostListItem],
+    response_model_exclude_unset=True,
+)
+async def search_blogs(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    category_id: Optional[int] = None,
+    sub_category_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    posts = (
-        db.query(
-            Post,
-            Category.name.label("category_name"),
-            SubCategory.name.label("sub_category_name"),
+    if not q.split():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    selected = _parse_fields(fields)
+    query, rank = _search_rank(db, _select_post_fields(selected), q)
+    query = _filter_visible_posts(
+        query.add_columns(rank.label("rank")),
+        current_user, category_id, sub_category_id, owner_id,
+    )
+    if cursor:
+        try:
+            last_rank, last_id = decode_rank_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            (rank < last_rank) | ((rank == last_rank) & (Post.id < last_id))
         )
-        .outerjoin(Category, Category.id == Post.category_id)
-        .outerjoin(SubCategory, SubCategory.id == Post.sub_category_id)
-        .filter(Post.is_public | (Post.owner_id == current_user.id))
-        .all()
+
+    limit = clamp_limit(limit)
+    result = await db.execute(
+        query.order_by(rank.desc(), Post.id.desc()).limit(limit + 1)
     )
-    response = []
-    for post, category_name, sub_category_name in posts:
-        item = post.__dict__.copy()
-        del item["_sa_instance_state"]
-        item["category_name"] = category_name
-        item["sub_category_name"] = sub_category_name
-        response.append(item)
-    return response
+    rows = result.all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_rank_cursor(
+            rows[-1].rank, rows[-1].id
+        )
+    content = await _render_posts(db, current_user, rows, selected)
+    return conditional_response(request, content.encode(), headers=headers)
+
+
+async def _ndjson_lines(request: Request):
+    """Yield the request body line by line without buffering all of it."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > POST_IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail="Import line too long")
+        for line in lines:
+            yield line
+    yield pending
+
+
+def _import_error(line_number: int, exc: ValidationError) -> dict:
+    error = exc.errors(include_url=False)[0]
+    location = ".".join(str(part) for part in error["loc"])
+    detail = f"{location}: {error['msg']}" if location else error["msg"]
+    return {"line": line_number, "detail": detail}
+
+
+@router.post("/blog/import")
+async def import_blogs(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """Create posts from an NDJSON body, one ``PostCreate`` per line.
+
+    Valid lines are inserted in batches, each batch in its own
+    transaction; invalid lines are skipped and reported by line number.
+    """
+    imported, failed, errors = 0, 0, []
+    batch: list[dict] = []
+
+    async def flush():
+        nonlocal imported, batch
+        if batch:
+            await db.execute(insert(Post).values(batch))
+            await db.commit()
+            imported += len(batch)
+            batch = []
+
+    try:
+        line_number = 0
+        async for line in _ndjson_lines(request):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                post = PostCreate.model_validate_json(line)
+            except ValidationError as exc:
+                failure = _import_error(line_number, exc)
+            else:
+                error = await catalog.validate(
+                    db, post.category_id, post.sub_category_id
+                )
+                if error is None:
+                    batch.append(
+                        dict(post.model_dump(), owner_id=current_user.id)
+                    )
+                    if len(batch) >= POST_IMPORT_BATCH_SIZE:
+                        await flush()
+                    continue
+                failure = {"line": line_number, "detail": error}
+            failed += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(failure)
+        await flush()
+    finally:
+        # Batches committed before a failure stay imported
+        if imported:
+            await invalidate_posts()
+            catalog.invalidate_tree()
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+@router.get("/blog/export")
+async def export_blogs(
+    category_id: Optional[int] = None,
+    sub_category_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """Stream every post visible to the caller as NDJSON, oldest first."""
+    query = _filter_visible_posts(
+        select(*(getattr(Post, f) for f in _EXPORT_FIELDS)),
+        current_user, category_id, sub_category_id, owner_id,
+    ).order_by(Post.id)
+
+    async def rows():
+        # Dependencies are torn down before the body is sent, so the
+        # closed session is reused here and closed again at the end. Rows
+        # come from a server-side cursor a batch at a time.
+        try:
+            result = await db.stream(
+                query.execution_options(yield_per=POST_EXPORT_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                yield b"".join(
+                    _post_item_json.dump_json(dict(row._mapping)) + b"\n"
+                    for row in partition
+                )
+        finally:
+            await db.close()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
 
 
 @router.get("/blog/{post_id}", response_model=PostGetResponse)
 async def get_blog(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    if not post.is_public and post.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    return post
+    # Only public posts are cached, so a hit needs no visibility check
+    cached = await cached_response(db, post_key(post_id))
+    if cached is None:
+        post = await db.get(Post, post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if not post.is_public and post.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        await catalog.ensure_loaded(db)
+        response = PostGetResponse.model_validate(post)
+        response.category_name = catalog.category_name(post.category_id)
+        response.sub_category_name = catalog.sub_category_name(
+            post.sub_category_id
+        )
+        cached = {
+            "content": response.model_dump_json(exclude={"liked_by_me"}),
+            "updated_at": (
+                post.updated_at.isoformat() if post.updated_at else None
+            ),
+        }
+        if post.is_public:
+            await response_cache.post_cache.set(post_key(post_id), cached)
+    liked = await get_liked_post_ids(db, current_user.id, [post_id])
+    # The cached JSON object is shared by all viewers; close it with the
+    # caller's flag instead of parsing and re-serializing it.
+    content = cached["content"][:-1] + (
+        ',"liked_by_me":true}' if liked else ',"liked_by_me":false}'
+    )
+    last_modified = (
+        datetime.fromisoformat(cached["updated_at"])
+        if cached["updated_at"]
+        else None
+    )
+    return conditional_response(request, content.encode(), last_modified)
+
+
+async def _check_placement(
+    db: AsyncSession,
+    post_id: int,
+    current_user: AuthenticatedUser,
+    category_id: int,
+    sub_category_id: int,
+) -> None:
+    error = await catalog.validate(db, category_id, sub_category_id)
+    if error:
+        # Callers who can't edit the post get the 403 they always got;
+        # this id-only lookup is off the happy path.
+        owned = await db.scalar(
+            select(Post.id).where(
+                Post.id == post_id, Post.owner_id == current_user.id
+            )
+        )
+        if owned is None:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        raise HTTPException(status_code=400, detail=error)
+
+
+async def _update_owned_post(
+    db: AsyncSession,
+    post_id: int,
+    current_user: AuthenticatedUser,
+    changes: dict,
+):
+    # Ownership is part of the WHERE clause, so nothing is loaded first:
+    # a missing post and someone else's post both match no row.
+    row = await update_returning(
+        db,
+        update(Post)
+        .where(Post.id == post_id, Post.owner_id == current_user.id)
+        .values(**changes),
+        *(getattr(Post, f) for f in PostResponse.model_fields),
+    )
+    if row is None:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    await db.commit()
+    await invalidate_posts(post_id)
+    return row._mapping
+
+
+async def _delete_owned_posts(
+    db: AsyncSession, owner_id: int, post_ids: list[int]
+) -> int:
+    # One statement that never reads the posts themselves; their likes go
+    # with them (ON DELETE CASCADE)
+    result = await db.execute(
+        delete(Post).where(Post.id.in_(post_ids), Post.owner_id == owner_id)
+    )
+    await db.commit()
+    return result.rowcount
 
 
 @router.put("/blog/{post_id}", response_model=PostResponse)
 async def update_blog(
     post_id: int,
     post_data: PostCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post or post.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    for attr, value in post_data.dict().items():
-        setattr(post, attr, value)
-    db.commit()
-    db.refresh(post)
+    await _check_placement(
+        db, post_id, current_user,
+        post_data.category_id, post_data.sub_category_id,
+    )
+    post = await _update_owned_post(
+        db, post_id, current_user, post_data.model_dump()
+    )
+    catalog.invalidate_tree()
     return post
 
 
+@router.patch("/blog/{post_id}", response_model=PostResponse)
+async def patch_blog(
+    post_id: int,
+    post_data: PostUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    changes = post_data.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    placement = {"category_id", "sub_category_id"} & changes.keys()
+    if len(placement) == 1:
+        raise HTTPException(
+            status_code=400,
+            detail="category_id and sub_category_id must be changed together",
+        )
+    if placement:
+        await _check_placement(
+            db, post_id, current_user,
+            changes["category_id"], changes["sub_category_id"],
+        )
+    post = await _update_owned_post(db, post_id, current_user, changes)
+    if placement or "is_public" in changes:
+        catalog.invalidate_tree()
+    return post
+
+
+@router.delete("/blog")
+async def delete_blogs(
+    body: PostIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    # Posts of other users and unknown ids are skipped silently
+    count = await _delete_owned_posts(db, current_user.id, body.post_ids)
+    if count:
+        await invalidate_posts(*body.post_ids)
+        catalog.invalidate_tree()
+    return {"message": "Posts deleted", "count": count}
+
+
 @router.delete("/blog/{post_id}")
 async def delete_blog(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post or post.owner_id != current_user.id:
+    if not await _delete_owned_posts(db, current_user.id, [post_id]):
         raise HTTPException(status_code=403, detail="Not authorized")
-    db.delete(post)
-    db.commit()
+    await invalidate_posts(post_id)
+    catalog.invalidate_tree()
     return {"message": "Post deleted"}
@@ -0,0 +1,178 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth import AuthenticatedUser, get_admin_user
+from src.catalog import catalog
+from src.database import get_db
+from src.models import Category, Post, SubCategory
+from src.response_cache import conditional_response, invalidate_all_posts
+from src.schemas import (
+    CategoryCreate,
+    CategoryResponse,
+    CategoryTree,
+    SubCategoryCreate,
+    SubCategoryResponse,
+)
+
+router = APIRouter(prefix="/v1")
+
+
+async def _catalog_changed(db: AsyncSession) -> None:
+    await catalog.load(db)
+    # Category names are baked into cached post responses
+    await invalidate_all_posts()
+
+
+# Category Endpoints
+@router.get("/categories", response_model=list[CategoryResponse])
+async def list_categories(db: AsyncSession = Depends(get_db)):
+    await catalog.ensure_loaded(db)
+    return [
+        {"id": id_, "name": name}
+        for id_, name in sorted(catalog.categories.items())
+    ]
+
+
+@router.get("/categories/tree", response_model=list[CategoryTree])
+async def get_category_tree(
+    request: Request, db: AsyncSession = Depends(get_db)
+):
+    # Served from the catalog's snapshot; no queries until something changes
+    return conditional_response(request, (await catalog.tree(db)).encode())
+
+
+@router.post("/categories", response_model=CategoryResponse)
+async def create_category(
+    body: CategoryCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    category = Category(name=body.name)
+    db.add(category)
+    await db.commit()
+    await _catalog_changed(db)
+    return category
+
+
+@router.get("/categories/{category_id}", response_model=CategoryResponse)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+    await catalog.ensure_loaded(db)
+    name = catalog.category_name(category_id)
+    if name is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return {"id": category_id, "name": name}
+
+
+@router.put("/categories/{category_id}", response_model=CategoryResponse)
+async def update_category(
+    category_id: int,
+    body: CategoryCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    result = await db.execute(
+        update(Category)
+        .where(Category.id == category_id)
+        .values(name=body.name)
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Category not found")
+    await db.commit()
+    await _catalog_changed(db)
+    return {"id": category_id, "name": body.name}
+
+
+@router.delete("/categories/{category_id}")
+async def delete_category(
+    category_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    # A post may be filed under one of this category's sub-categories
+    # without carrying its category_id; those block the delete too
+    sub_category_ids = select(SubCategory.id).where(
+        SubCategory.category_id == category_id
+    )
+    in_use = await db.scalar(
+        select(
+            exists().where(
+                or_(
+                    Post.category_id == category_id,
+                    Post.sub_category_id.in_(sub_category_ids),
+                )
+            )
+        )
+    )
+    if in_use:
+        raise HTTPException(status_code=400, detail="Category has posts")
+    await db.execute(
+        delete(SubCategory).where(SubCategory.category_id == category_id)
+    )
+    result = await db.execute(
+        delete(Category).where(Category.id == category_id)
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Category not found")
+    await db.commit()
+    await _catalog_changed(db)
+    return {"message": "Category deleted"}
+
+
+# Sub Category Endpoints
+@router.post(
+    "/categories/{category_id}/sub-categories",
+    response_model=SubCategoryResponse,
+)
+async def create_sub_category(
+    category_id: int,
+    body: SubCategoryCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    if not await db.get(Category, category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    sub_category = SubCategory(name=body.name, category_id=category_id)
+    db.add(sub_category)
+    await db.commit()
+    await _catalog_changed(db)
+    return sub_category
+
+
+@router.put(
+    "/sub-categories/{sub_category_id}", response_model=SubCategoryResponse
+)
+async def update_sub_category(
+    sub_category_id: int,
+    body: SubCategoryCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    sub_category = await db.get(SubCategory, sub_category_id)
+    if not sub_category:
+        raise HTTPException(status_code=404, detail="Sub Category not found")
+    sub_category.name = body.name
+    await db.commit()
+    await _catalog_changed(db)
+    return sub_category
+
+
+@router.delete("/sub-categories/{sub_category_id}")
+async def delete_sub_category(
+    sub_category_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_admin_user),
+):
+    in_use = await db.scalar(
+        select(exists().where(Post.sub_category_id == sub_category_id))
+    )
+    if in_use:
+        raise HTTPException(status_code=400, detail="Sub Category has posts")
+    result = await db.execute(
+        delete(SubCategory).where(SubCategory.id == sub_category_id)
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Sub Category not found")
+    await db.commit()
+    await _catalog_changed(db)
+    return {"message": "Sub Category deleted"}
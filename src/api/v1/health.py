@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from src import database
+from src.database import pool_stats
+
+router = APIRouter(prefix="/v1")
+
+
+# Health Endpoints
+@router.get("/health/db-pool")
+async def db_pool():
+    return pool_stats()
+
+
+@router.get("/health/replicas")
+async def db_replicas():
+    # Results of the last background health check
+    if database.replicas is None:
+        return []
+    return database.replicas.stats()
@@ -1,65 +1,193 @@
-from sqlalchemy.orm import Session
-from src.database import get_db
-from src.models import User, Post, Like
-from src.auth import get_current_user
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import get_db, insert_ignore
+from src.models import Post, Like
+from src.auth import AuthenticatedUser, get_current_user
+from src.pagination import MAX_PAGE_SIZE
+from src.response_cache import invalidate_likes
+from src.schemas import PostIds
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 router = APIRouter(prefix="/v1")
 
 
+async def get_liked_post_ids(
+    db: AsyncSession, user_id: int, post_ids: list[int]
+) -> set[int]:
+    """Which of ``post_ids`` the user has liked, in a single query."""
+    if not post_ids:
+        return set()
+    result = await db.execute(
+        select(Like.post_id).where(
+            Like.user_id == user_id, Like.post_id.in_(post_ids)
+        )
+    )
+    return set(result.scalars())
+
+
+def _change_like_count(post_id: int, delta: int):
+    return (
+        update(Post)
+        .where(Post.id == post_id)
+        .values(like_count=Post.like_count + delta)
+    )
+
+
+def lock_posts(*criteria):
+    """``SELECT ... FOR UPDATE`` of the matching posts, in id order.
+
+    Like writes lock the post rows before touching ``likes``: otherwise
+    the likes' foreign key checks take shared locks on the posts that the
+    counter updates then need exclusively, and two writers holding the
+    shared lock deadlock. Locking in id order keeps batches from
+    deadlocking with each other. SQLite ignores it; it locks the whole
+    database for writes anyway.
+    """
+    return (
+        select(Post.id)
+        .where(*criteria)
+        .order_by(Post.id)
+        .with_for_update(of=Post)
+    )
+
+
+def _recount_likes(post_ids: list[int]):
+    return (
+        update(Post)
+        .where(Post.id.in_(post_ids))
+        .values(
+            like_count=select(func.count(Like.id))
+            .where(Like.post_id == Post.id)
+            .scalar_subquery()
+        )
+    )
+
+
+# Bulk Like Endpoints
+@router.post("/likes")
+async def like_posts(
+    body: PostIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    # Private posts of other users and unknown ids are skipped silently
+    visible_posts = select(literal(current_user.id), Post.id).where(
+        Post.id.in_(body.post_ids),
+        Post.is_public | (Post.owner_id == current_user.id),
+    )
+    await db.execute(lock_posts(Post.id.in_(body.post_ids)))
+    result = await db.execute(
+        insert_ignore(db, Like).from_select(
+            ["user_id", "post_id"], visible_posts
+        )
+    )
+    if result.rowcount:
+        await db.execute(_recount_likes(body.post_ids))
+    await db.commit()
+    if result.rowcount:
+        await invalidate_likes(current_user.id, *body.post_ids)
+    return {"message": "Posts liked", "count": result.rowcount}
+
+
+@router.delete("/likes")
+async def unlike_posts(
+    body: PostIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    await db.execute(lock_posts(Post.id.in_(body.post_ids)))
+    result = await db.execute(
+        delete(Like).where(
+            Like.user_id == current_user.id, Like.post_id.in_(body.post_ids)
+        )
+    )
+    if result.rowcount:
+        await db.execute(_recount_likes(body.post_ids))
+    await db.commit()
+    if result.rowcount:
+        await invalidate_likes(current_user.id, *body.post_ids)
+    return {"message": "Posts unliked", "count": result.rowcount}
+
+
+@router.get("/likes")
+async def get_liked_posts(
+    post_ids: Annotated[list[int], Query(max_length=MAX_PAGE_SIZE)],
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    liked = await get_liked_post_ids(db, current_user.id, post_ids)
+    return {"post_ids": sorted(liked)}
+
+
 # Like Endpoints
 @router.post("/like/{post_id}")
 async def like_post(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
-    # Validate post_id exists
-    post = db.query(Post).filter(Post.id == post_id).first()
+    # The counter goes first, and only if the post is visible to the
+    # caller: the UPDATE takes the post row's exclusive lock before the
+    # INSERT's foreign key check would take a shared one, so concurrent
+    # likes of a hot post queue up instead of deadlocking. The unique
+    # (post_id, user_id) index makes a repeat insert nothing, and the
+    # increment is rolled back with it.
+    counted = await db.execute(
+        _change_like_count(post_id, 1).where(
+            Post.is_public | (Post.owner_id == current_user.id)
+        )
+    )
+    if counted.rowcount:
+        result = await db.execute(
+            insert_ignore(db, Like).values(
+                user_id=current_user.id, post_id=post_id
+            )
+        )
+        if result.rowcount:
+            await db.commit()
+            await invalidate_likes(current_user.id, post_id)
+            return {"message": "Post liked"}
+
+    # Nothing inserted: work out why, off the hot path
+    await db.rollback()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-
     # Only allow liking public or own post
     if not post.is_public and post.owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="You cannot like a private post you don't own",
         )
-
-    like_exist = (
-        db.query(Like)
-        .filter(Like.post_id == post_id, Like.user_id == current_user.id)
-        .first()
+    raise HTTPException(
+        status_code=400, detail="You have already liked this post."
     )
-    if like_exist:
-        raise HTTPException(
-            status_code=400, detail="You have already liked this post."
-        )
-    like = Like(post_id=post_id, user_id=current_user.id)
-
-    db.add(like)
-    db.commit()
-    return {"message": "Post liked"}
 
 
 @router.delete("/like/{post_id}")
 async def unlike_post(
     post_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
+    # Post row first, as in like_post
+    counted = await db.execute(_change_like_count(post_id, -1))
+    if counted.rowcount:
+        result = await db.execute(
+            delete(Like).where(
+                Like.post_id == post_id, Like.user_id == current_user.id
+            )
+        )
+        if result.rowcount:
+            await db.commit()
+            await invalidate_likes(current_user.id, post_id)
+            return {"message": "Post unliked"}
+
+    await db.rollback()
     # Validate post_id exists
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-
-    like = (
-        db.query(Like)
-        .filter(Like.post_id == post_id, Like.user_id == current_user.id)
-        .first()
-    )
-    if like:
-        db.delete(like)
-        db.commit()
-        return {"message": "Post unliked"}
     raise HTTPException(status_code=400, detail="You have not liked this post")
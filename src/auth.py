@@ -1,11 +1,23 @@
 # auth.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
+import uuid
 import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from src.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.cache import CacheBackend, ExpiringCache, InMemoryCache
+from src.database import (
+    AsyncSessionLocal,
+    get_db,
+    get_engine,
+    get_read_engine,
+    pinned_to_primary,
+)
 from src.models import User
 import os
 
@@ -13,13 +25,93 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Refresh tokens are exchanged for a new pair (and spent) at
+# POST /v1/accounts/refresh, so a session outlives its access token
+# without another bcrypt verify.
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+# bcrypt cost factor; each +1 doubles the time spent per hash/verify
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Jobs allowed to wait for a worker before requests are turned away
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+# Embed name/email in access tokens so authenticated requests need no user
+# lookup at all; edits and deletions then only take effect on new tokens.
+JWT_EMBED_USER_CLAIMS = os.getenv(
+    "JWT_EMBED_USER_CLAIMS", "false"
+).lower() in ("1", "true", "yes")
+# Comma-separated user ids allowed to edit site-wide data such as the
+# category taxonomy; nobody can until it is set.
+ADMIN_USER_IDS = frozenset(
+    int(user_id)
+    for user_id in os.getenv("ADMIN_USER_IDS", "").split(",")
+    if user_id.strip()
+)
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+# bcrypt releases the GIL, so a small thread pool keeps it off the event
+# loop without the pickling overhead of a process pool.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_pending = 0
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/accounts/login")
 
+# Authenticated users by id; swap in a shared backend with
+# configure_user_cache so invalidations reach every worker.
+user_cache: CacheBackend = InMemoryCache(
+    max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS
+)
+# Logged out (or replayed) session families and spent refresh token ids,
+# each kept until no token it covers can still be used; nothing is evicted
+# early. Swap in shared backends with configure_revoked_tokens so a logout
+# holds on every worker.
+revoked_families: CacheBackend = ExpiringCache()
+spent_refresh_tokens: CacheBackend = ExpiringCache()
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """The caller's identity, detached from any database session."""
+
+    id: int
+    name: str
+    email: str
+
+
+def configure_user_cache(backend: CacheBackend) -> None:
+    global user_cache
+    user_cache = backend
+
+
+def configure_revoked_tokens(
+    families: CacheBackend, spent_tokens: CacheBackend
+) -> None:
+    global revoked_families, spent_refresh_tokens
+    revoked_families = families
+    spent_refresh_tokens = spent_tokens
+
+
+def _user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+async def invalidate_user(user_id: int) -> None:
+    await user_cache.delete(_user_cache_key(user_id))
+
+
+def user_claims(user: User) -> dict:
+    claims = {"sub": str(user.id)}
+    if JWT_EMBED_USER_CLAIMS:
+        claims.update(name=user.name, email=user.email)
+    return claims
+
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -29,6 +121,34 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_hash_job(fn, *args):
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_job(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    return await _run_hash_job(
+        verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     expires_delta = (
@@ -42,23 +162,141 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def issue_tokens(claims: dict, family: str = None) -> dict:
+    """An access/refresh token pair for one login session.
+
+    Both tokens carry the session's ``fam`` id, so revoking the family
+    (logout, or a spent refresh token presented again) ends the session.
+    """
+    family = family or uuid.uuid4().hex
+    access_token = create_access_token(
+        {**claims, "fam": family, "jti": uuid.uuid4().hex}
+    )
+    refresh_token = create_access_token(
+        {
+            "sub": claims["sub"],
+            "fam": family,
+            "jti": uuid.uuid4().hex,
+            "typ": "refresh",
+        },
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+def _revocation_ttl(payload: dict) -> float:
+    return max(payload["exp"] - time.time(), 1)
+
+
+async def revoke_family(family: str) -> None:
+    # Outlives every token of the family, however recently refreshed
+    await revoked_families.set(
+        f"revoked:fam:{family}",
+        True,
+        ttl=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS).total_seconds(),
+    )
+
+
+async def is_family_revoked(family: str) -> bool:
+    return await revoked_families.get(f"revoked:fam:{family}") is not None
+
+
+async def spend_refresh_token(payload: dict) -> bool:
+    """Mark a refresh token used; ``False`` if it already was."""
+    return await spent_refresh_tokens.add(
+        f"revoked:jti:{payload['jti']}", True, ttl=_revocation_ttl(payload)
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_token(token: str, token_type: str = None) -> dict:
+    """Verify a token's signature and expiry, and that its ``typ`` claim
+    (absent on access tokens) is ``token_type``."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
+        payload["sub"] = int(payload["sub"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        raise _credentials_exception()
+    if payload.get("typ") != token_type:
+        raise _credentials_exception()
+    return payload
+
+
+async def load_user(db: AsyncSession, user_id: int) -> AuthenticatedUser:
+    """The user by id, through the user cache; 401 if they're gone or
+    their account is being deleted."""
+    cached = await user_cache.get(_user_cache_key(user_id))
+    if cached is None:
+        user = await db.get(User, user_id)
+        if user is None or user.deleted_at is not None:
+            raise _credentials_exception()
+        cached = asdict(
+            AuthenticatedUser(id=user.id, name=user.name, email=user.email)
+        )
+        await user_cache.set(_user_cache_key(user_id), cached)
+    return AuthenticatedUser(**cached)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> AuthenticatedUser:
+    payload = decode_token(token)
+    user_id = payload["sub"]
+    # Tokens issued before sessions had families can't be revoked
+    if "fam" in payload and await is_family_revoked(payload["fam"]):
+        raise _credentials_exception()
+    # get_db pins the caller's reads to the primary once they've written
+    db.info["user_id"] = user_id
+
+    if JWT_EMBED_USER_CLAIMS and "name" in payload and "email" in payload:
+        return AuthenticatedUser(
+            id=user_id, name=payload["name"], email=payload["email"]
+        )
+    return await load_user(db, user_id)
+
+
+async def get_admin_user(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+) -> AuthenticatedUser:
+    if current_user.id not in ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
+async def get_current_db_user(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """Load the caller's ``User`` row, for handlers that modify it."""
+    user = await db.get(User, current_user.id)
+    if user is None or user.deleted_at is not None:
+        await invalidate_user(current_user.id)
+        raise _credentials_exception()
     return user
+
+
+async def get_read_db(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """Session for read-only handlers, on a replica where possible."""
+    pinned = await pinned_to_primary(current_user.id)
+    db_engine = get_engine() if pinned else await get_read_engine()
+    async with AsyncSessionLocal(bind=db_engine) as db:
+        # Shared caches may hold what a lagging replica returned, so
+        # handlers skip them for this session (see cached_response)
+        db.info["pinned_to_primary"] = pinned
+        yield db
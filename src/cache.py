@@ -0,0 +1,183 @@
+# cache.py
+import heapq
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    """Interface for key/value caches shared by the API.
+
+    Values must be plain JSON-compatible data so that a networked backend
+    (e.g. Redis) can be dropped in to share entries and invalidations
+    between worker processes.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def add(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> bool:
+        """Set ``key`` only if it is absent; ``False`` if it was present."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+
+class InMemoryCache(CacheBackend):
+    """Size-bounded LRU cache with per-entry TTL, local to one process.
+
+    With ``max_bytes`` the least recently used entries are also dropped to
+    keep the values' JSON size within that budget, so caching large bodies
+    can't grow a worker's memory with traffic.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # key -> (expiry, value, JSON size counted against max_bytes)
+        self._data: OrderedDict[str, tuple[Optional[float], Any, int]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _sizeof(self, value: Any) -> int:
+        if self.max_bytes is None:
+            return 0
+        return len(json.dumps(value, separators=(",", ":")))
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self._sizeof(value)
+        self._pop(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._data[key] = (expires_at, value, size)
+        self.size_bytes += size
+        while len(self._data) > self.max_size or (
+            self.max_bytes is not None and self.size_bytes > self.max_bytes
+        ):
+            _, (_, _, evicted) = self._data.popitem(last=False)
+            self.size_bytes -= evicted
+
+    async def add(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._pop(key)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self.size_bytes = 0
+
+
+class ExpiringCache(CacheBackend):
+    """Cache whose entries leave only when their TTL runs out, local to one
+    process.
+
+    Nothing is evicted to make room, so it suits data that must not be
+    forgotten early, such as token revocations. Every entry needs a TTL;
+    memory grows with the number of entries that have not yet expired.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        # key -> (expiry, value)
+        self._data: dict[str, tuple[float, Any]] = {}
+        # (expiry, key), soonest first; stale once the key is set again
+        self._expiries: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _purge(self, now: float) -> None:
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == expires_at:
+                del self._data[key]
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is None:
+            raise ValueError("ExpiringCache entries need a ttl")
+        now = time.monotonic()
+        self._purge(now)
+        self._data[key] = (now + ttl, value)
+        heapq.heappush(self._expiries, (now + ttl, key))
+
+    async def add(
+        self, key: str, value: Any, ttl: Optional[float] = None
+    ) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self._expiries.clear()
@@ -0,0 +1,144 @@
+# catalog.py
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Category, Post, SubCategory
+
+# Categories are tiny and rarely change, so every worker keeps a full copy.
+# It is reloaded after this many seconds, after writes through the API, and
+# when a lookup misses (at most once per CATALOG_MISS_RELOAD_SECONDS, so
+# bogus ids can't turn into a reload per request).
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))
+CATALOG_MISS_RELOAD_SECONDS = float(
+    os.getenv("CATALOG_MISS_RELOAD_SECONDS", "5")
+)
+
+
+class Catalog:
+    """In-process copy of the category / sub-category tables."""
+
+    def __init__(self):
+        self.categories: dict[int, str] = {}
+        # sub-category id -> (name, parent category id)
+        self.sub_categories: dict[int, tuple[str, Optional[int]]] = {}
+        self.loaded_at: Optional[float] = None
+        # Rendered GET /v1/categories/tree body, rebuilt after any change
+        self._tree: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        self.categories, self.sub_categories = {}, {}
+        self.loaded_at = None
+        self._tree = None
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession) -> None:
+        async with self._lock:
+            categories = await db.execute(select(Category.id, Category.name))
+            sub_categories = await db.execute(
+                select(
+                    SubCategory.id, SubCategory.name, SubCategory.category_id
+                )
+            )
+            # Swap whole dicts so readers never see a half-built catalog
+            self.categories = dict(categories.tuples().all())
+            self.sub_categories = {
+                id_: (name, category_id)
+                for id_, name, category_id in sub_categories.tuples().all()
+            }
+            self.loaded_at = time.monotonic()
+            self._tree = None
+
+    def _age(self) -> float:
+        if self.loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self.loaded_at
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self._age() >= CATALOG_REFRESH_SECONDS:
+            await self.load(db)
+
+    def category_name(self, category_id: Optional[int]) -> Optional[str]:
+        return self.categories.get(category_id)
+
+    def sub_category_name(
+        self, sub_category_id: Optional[int]
+    ) -> Optional[str]:
+        entry = self.sub_categories.get(sub_category_id)
+        return entry[0] if entry else None
+
+    def _check(
+        self, category_id: int, sub_category_id: int
+    ) -> Optional[str]:
+        if category_id not in self.categories:
+            return "Category doesn't match with id"
+        if sub_category_id not in self.sub_categories:
+            return "Sub Category doesn't match with id"
+        if self.sub_categories[sub_category_id][1] != category_id:
+            return "Sub Category doesn't belong to Category"
+        return None
+
+    async def validate(
+        self, db: AsyncSession, category_id: int, sub_category_id: int
+    ) -> Optional[str]:
+        """Return an error message if the pair isn't a valid placement."""
+        await self.ensure_loaded(db)
+        error = self._check(category_id, sub_category_id)
+        if error and self._age() >= CATALOG_MISS_RELOAD_SECONDS:
+            # Rows may have been added since the last load
+            await self.load(db)
+            error = self._check(category_id, sub_category_id)
+        return error
+
+    def invalidate_tree(self) -> None:
+        """Drop the tree snapshot; post counts changed."""
+        self._tree = None
+
+    async def tree(self, db: AsyncSession) -> str:
+        """The category hierarchy with public post counts, as JSON."""
+        await self.ensure_loaded(db)
+        if self._tree is not None:
+            return self._tree
+        result = await db.execute(
+            select(Post.category_id, Post.sub_category_id, func.count())
+            .where(Post.is_public)
+            .group_by(Post.category_id, Post.sub_category_id)
+        )
+        category_counts: dict[int, int] = {}
+        sub_category_counts: dict[int, int] = {}
+        for category_id, sub_category_id, count in result.tuples():
+            category_counts[category_id] = (
+                category_counts.get(category_id, 0) + count
+            )
+            sub_category_counts[sub_category_id] = (
+                sub_category_counts.get(sub_category_id, 0) + count
+            )
+        tree = {
+            id_: {
+                "id": id_,
+                "name": name,
+                "post_count": category_counts.get(id_, 0),
+                "sub_categories": [],
+            }
+            for id_, name in sorted(self.categories.items())
+        }
+        for id_, (name, category_id) in sorted(self.sub_categories.items()):
+            if category_id in tree:
+                tree[category_id]["sub_categories"].append(
+                    {
+                        "id": id_,
+                        "name": name,
+                        "post_count": sub_category_counts.get(id_, 0),
+                    }
+                )
+        self._tree = json.dumps(list(tree.values()), separators=(",", ":"))
+        return self._tree
+
+
+catalog = Catalog()
@@ -1,10 +1,26 @@
 # database.py
+import asyncio
+import contextlib
 import os
-from sqlalchemy import create_engine
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import event, exc, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 
+from src.cache import CacheBackend, InMemoryCache
+from src.metrics import Histogram, current_query_stats
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -14,18 +30,336 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
+# Connection pool sizing, per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# MySQL drops idle connections after wait_timeout (8h by default)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in (
+    "1", "true", "yes",
+)
+
 SQLALCHEMY_DATABASE_URL = (
     f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
+# Request handlers talk to the database through aiomysql so a slow query
+# only suspends its own coroutine instead of blocking the event loop.
+ASYNC_SQLALCHEMY_DATABASE_URL = (
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 # SQLALCHEMY_DATABASE_URL = "sqlite:///./cms.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./cms.db"
+
+# Comma-separated async URLs of read replicas. Read-only GET endpoints go
+# to them in turn, skipping any that failed their last health check; a
+# user who just wrote reads from the primary for DB_READ_YOUR_WRITES_SECONDS
+# so they see their own changes despite replication lag.
+DB_REPLICA_URLS = tuple(
+    url.strip()
+    for url in os.getenv("DB_REPLICA_URLS", "").split(",")
+    if url.strip()
+)
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+DB_REPLICA_CHECK_TIMEOUT = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "1"))
+DB_READ_YOUR_WRITES_SECONDS = float(
+    os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5")
+)
+DB_RECENT_WRITERS_MAX_SIZE = int(
+    os.getenv("DB_RECENT_WRITERS_MAX_SIZE", "10000")
+)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram()
+        self.timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(time.perf_counter() - start)
+
+
+def enable_sqlite_foreign_keys(db_engine) -> None:
+    """SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked."""
+    sync_engine = getattr(db_engine, "sync_engine", db_engine)
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(sync_engine, "connect", on_connect)
+
+
+def instrument_engine(db_engine) -> None:
+    """Count and time each statement against the current request."""
+    sync_engine = getattr(db_engine, "sync_engine", db_engine)
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context.query_started_at = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(
+                statement, time.perf_counter() - context.query_started_at
+            )
+
+    event.listen(sync_engine, "before_cursor_execute", before)
+    event.listen(sync_engine, "after_cursor_execute", after)
+
+
+class ReplicaSet:
+    """Read replicas handed out round-robin, skipping unhealthy ones.
+
+    Health is re-checked with a ``SELECT 1`` per replica every
+    ``check_interval`` seconds by a background task (see
+    ``start_health_checks``); requests only read the last result, so a
+    hanging replica never holds one up. Replicas count as healthy until
+    the first check says otherwise.
+    """
+
+    def __init__(
+        self,
+        engines: Iterable[AsyncEngine],
+        check_interval: float = DB_REPLICA_CHECK_SECONDS,
+        check_timeout: float = DB_REPLICA_CHECK_TIMEOUT,
+    ):
+        self.engines = list(engines)
+        self.healthy = [True] * len(self.engines)
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.checked_at: Optional[float] = None
+        self._next = 0
+        self._checker: Optional[asyncio.Task] = None
+
+    async def _ping(self, db_engine: AsyncEngine) -> bool:
+        async def select_one():
+            async with db_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        # Health checks don't count against the request that runs them
+        token = current_query_stats.set(None)
+        try:
+            await asyncio.wait_for(select_one(), self.check_timeout)
+            return True
+        except Exception:
+            return False
+        finally:
+            current_query_stats.reset(token)
+
+    async def check(self) -> None:
+        self.checked_at = time.monotonic()
+        self.healthy = list(
+            await asyncio.gather(*(self._ping(e) for e in self.engines))
+        )
+
+    async def _check_forever(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start_health_checks(self) -> None:
+        """Check every ``check_interval`` seconds until ``dispose``."""
+        if self._checker is None:
+            self._checker = asyncio.create_task(self._check_forever())
+
+    async def pick(self) -> Optional[AsyncEngine]:
+        """The next healthy replica, or ``None`` if there is none."""
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (index + 1) % len(self.engines)
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "url": db_engine.url.render_as_string(hide_password=True),
+                "healthy": healthy,
+            }
+            for db_engine, healthy in zip(self.engines, self.healthy)
+        ]
+
+    async def dispose(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._checker
+            self._checker = None
+        for db_engine in self.engines:
+            await db_engine.dispose()
+
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Engines are created on first use (normally by the application's lifespan
+# handler), so importing the application touches neither drivers nor the
+# database. Migrations build their own engine (migrations/env.py).
+async_engine: Optional[AsyncEngine] = None
+replicas: Optional[ReplicaSet] = None
+# Attributes stay loaded after commit; with AsyncSession an expired
+# attribute can't be lazily reloaded when a response is serialized.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+# Users who committed a write within DB_READ_YOUR_WRITES_SECONDS; swap in a
+# shared backend with configure_recent_writes so every worker sees them.
+recent_writes: CacheBackend = InMemoryCache(
+    max_size=DB_RECENT_WRITERS_MAX_SIZE, ttl=DB_READ_YOUR_WRITES_SECONDS
+)
+
+
+def _create_engine(url: str, pool_options: dict) -> AsyncEngine:
+    db_engine = create_async_engine(
+        url, poolclass=TimedAsyncQueuePool, **{**POOL_OPTIONS, **pool_options}
+    )
+    enable_sqlite_foreign_keys(db_engine)
+    instrument_engine(db_engine)
+    return db_engine
+
+
+def init_engine(
+    url: str = ASYNC_SQLALCHEMY_DATABASE_URL, **pool_options
+) -> AsyncEngine:
+    """Create the application's engine and bind ``AsyncSessionLocal``."""
+    global async_engine
+    async_engine = _create_engine(url, pool_options)
+    AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+def init_replicas(
+    urls: Iterable[str] = DB_REPLICA_URLS, **pool_options
+) -> Optional[ReplicaSet]:
+    """Create an engine per read replica; none configured means none."""
+    global replicas
+    urls = list(urls)
+    replicas = (
+        ReplicaSet(_create_engine(url, pool_options) for url in urls)
+        if urls
+        else None
+    )
+    return replicas
+
+
+def configure_recent_writes(backend: CacheBackend) -> None:
+    global recent_writes
+    recent_writes = backend
+
+
+def get_engine() -> AsyncEngine:
+    if async_engine is None:
+        return init_engine()
+    return async_engine
+
+
+async def dispose_engine() -> None:
+    global async_engine, replicas
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+    if replicas is not None:
+        await replicas.dispose()
+        replicas = None
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+def _recent_write_key(user_id: int) -> str:
+    return f"wrote:{user_id}"
+
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session) -> None:
+    session.info["committed"] = True
+
+
+async def get_db():
+    get_engine()
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+        # get_current_user tags the session with the caller; once they have
+        # committed, their reads stay on the primary for a while.
+        user_id = db.info.get("user_id")
+        if user_id is not None and db.info.get("committed"):
+            await recent_writes.set(_recent_write_key(user_id), True)
+
+
+async def pinned_to_primary(user_id: int) -> bool:
+    """Whether ``user_id`` wrote recently enough that a replica, or
+    anything read from one, may not show their write yet."""
+    if replicas is None:
+        return False
+    return await recent_writes.get(_recent_write_key(user_id)) is not None
+
+
+async def get_read_engine(user_id: Optional[int] = None) -> AsyncEngine:
+    """Engine for a read-only request: a healthy replica, or the primary
+    when there is none or ``user_id`` wrote recently."""
+    primary = get_engine()
+    if replicas is None:
+        return primary
+    if user_id is not None and await pinned_to_primary(user_id):
+        return primary
+    return await replicas.pick() or primary
+
+
+def insert_ignore(db, table):
+    """An ``INSERT`` that skips rows violating a unique constraint."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql_insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with("IGNORE")
+
+
+async def update_returning(db, statement, *columns):
+    """Run an ``UPDATE`` and return ``columns`` of the row it changed.
+
+    The values come back through ``RETURNING`` where the dialect has it;
+    elsewhere (MySQL) the row is read back by the same ``WHERE`` clause.
+    Returns ``None`` when no row matched.
+    """
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(statement.returning(*columns))
+        return result.first()
+    result = await db.execute(statement)
+    if not result.rowcount:
+        return None
+    result = await db.execute(select(*columns).where(statement.whereclause))
+    return result.first()
+
+
+def pool_stats(db_engine: Optional[AsyncEngine] = None) -> dict:
+    """Live counters for an engine's pool, for sizing pools per worker."""
+    pool = (db_engine or get_engine()).pool
+    stats = {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, TimedAsyncQueuePool):
+        stats["timeouts"] = pool.timeouts
+        stats["wait_seconds"] = pool.wait_time.snapshot()
+    return stats
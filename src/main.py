@@ -1,21 +1,106 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+from typing import Optional
 
+from fastapi import Depends, FastAPI
+
+from src.api import metrics
 from src.api.v1 import accounts
 from src.api.v1 import blog
+from src.api.v1 import categories
+from src.api.v1 import health
 from src.api.v1 import like
-from src.database import Base, engine
-
-app = FastAPI(
-    title="CMS demo api",
-    description="Rest api for user authentication and registration,"
-    " make a blog, like & dislike blog",
-    version="0.1.0",
-    openapi_url="/openapi.json",
-    docs_url="/docs",  # swagger UI
-    redoc_url="/redoc",
+from src.auth import configure_revoked_tokens, configure_user_cache
+from src.cache import ExpiringCache, InMemoryCache
+from src.catalog import catalog
+from src.database import (
+    DB_RECENT_WRITERS_MAX_SIZE,
+    configure_recent_writes,
+    dispose_engine,
+    init_engine,
+    init_replicas,
+)
+from src.middleware import MetricsMiddleware
+from src.purge import resume_purges
+from src.ratelimit import (
+    InMemoryRateLimitBackend,
+    configure_rate_limit_backend,
+    limit_route,
 )
-app.include_router(like.router)
-app.include_router(accounts.router)
-app.include_router(blog.router)
+from src.response_cache import configure_post_cache
+from src.settings import Settings
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Nothing here waits on the database: the pool opens connections
+        # on demand and the category catalog loads on its first lookup.
+        # Replica health checks and interrupted account purges run in the
+        # background from the start.
+        init_engine(settings.database_url, **settings.pool_options)
+        replica_set = init_replicas(
+            settings.replica_urls, **settings.pool_options
+        )
+        if replica_set is not None:
+            replica_set.start_health_checks()
+        configure_recent_writes(
+            InMemoryCache(
+                max_size=DB_RECENT_WRITERS_MAX_SIZE,
+                ttl=settings.read_your_writes_seconds,
+            )
+        )
+        configure_user_cache(
+            InMemoryCache(
+                max_size=settings.user_cache_max_size,
+                ttl=settings.user_cache_ttl_seconds,
+            )
+        )
+        configure_revoked_tokens(ExpiringCache(), ExpiringCache())
+        configure_post_cache(
+            InMemoryCache(
+                max_size=settings.post_cache_max_size,
+                ttl=settings.post_cache_ttl_seconds,
+                max_bytes=settings.post_cache_max_bytes,
+            )
+        )
+        configure_rate_limit_backend(
+            InMemoryRateLimitBackend(max_size=settings.rate_limit_max_keys)
+        )
+        catalog.clear()
+        resuming = None
+        if settings.resume_account_purges:
+            resuming = asyncio.create_task(resume_purges())
+        yield
+        if resuming is not None:
+            resuming.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await resuming
+        await dispose_engine()
+
+    app = FastAPI(
+        title="CMS demo api",
+        description="Rest api for user authentication and registration,"
+        " make a blog, like & dislike blog",
+        version="0.1.0",
+        openapi_url="/openapi.json",
+        docs_url="/docs",  # swagger UI
+        redoc_url="/redoc",
+        lifespan=lifespan,
+        dependencies=[Depends(limit_route)],
+    )
+    app.state.settings = settings
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(like.router)
+    app.include_router(accounts.router)
+    app.include_router(blog.router)
+    app.include_router(categories.router)
+    app.include_router(health.router)
+    app.include_router(metrics.router)
+    return app
+
 
-Base.metadata.create_all(bind=engine)
+app = create_app()
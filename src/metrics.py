@@ -0,0 +1,191 @@
+# metrics.py
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Thread-safe latency histogram with Prometheus-style ``le`` buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.buckets):
+                self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[str(bound)] = running
+            cumulative["+Inf"] = self.count
+            return {
+                "buckets": cumulative,
+                "count": self.count,
+                "sum": self.sum,
+            }
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+
+def render_histogram(name: str, labels: dict, snapshot: dict) -> list[str]:
+    lines = [
+        f"{name}_bucket{format_labels(dict(labels, le=bound))} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class LabeledHistogram:
+    """One ``Histogram`` per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = buckets
+        self._children: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(
+                    values, Histogram(self.buckets)
+                )
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for values, child in sorted(self._children.items()):
+            labels = dict(zip(self.label_names, values))
+            lines.extend(render_histogram(self.name, labels, child.snapshot()))
+        return lines
+
+
+class LabeledCounter:
+    """A monotonically increasing count per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def value(self, *values) -> float:
+        return self._values.get(values, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+        ]
+        for values, value in sorted(self._values.items()):
+            labels = dict(zip(self.label_names, values))
+            lines.append(f"{self.name}{format_labels(labels)} {value}")
+        return lines
+
+
+@dataclass
+class QueryStats:
+    """SQL statements issued while serving one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def most_repeated(self) -> tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+# Set by the metrics middleware for the duration of each request; the
+# engine's cursor hooks add to it (see database.instrument_engine).
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+REQUEST_LABELS = ("method", "route")
+http_request_duration = LabeledHistogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template and status code.",
+    REQUEST_LABELS + ("status",),
+)
+http_request_db_queries = LabeledHistogram(
+    "http_request_db_queries",
+    "SQL statements issued per request.",
+    REQUEST_LABELS,
+    QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = LabeledHistogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    REQUEST_LABELS,
+)
+http_request_n_plus_one = LabeledCounter(
+    "http_request_n_plus_one_total",
+    "Requests that repeated one SQL statement above the N+1 threshold.",
+    REQUEST_LABELS,
+)
+REQUEST_METRICS = (
+    http_request_duration,
+    http_request_db_queries,
+    http_request_db_duration,
+    http_request_n_plus_one,
+)
@@ -0,0 +1,72 @@
+# middleware.py
+import logging
+import os
+import time
+
+from src.metrics import (
+    QueryStats,
+    current_query_stats,
+    http_request_db_duration,
+    http_request_db_queries,
+    http_request_duration,
+    http_request_n_plus_one,
+)
+
+logger = logging.getLogger(__name__)
+
+# A request that runs the same SQL statement more than this many times is
+# counted (and logged) as a likely N+1 query pattern.
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+
+class MetricsMiddleware:
+    """Per-route latency, SQL statement count and DB time for each request.
+
+    A plain ASGI middleware, so the handler runs in the same context and
+    the engine hooks see this request's ``QueryStats``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_query_stats.reset(token)
+            self.record(scope, status, elapsed, stats)
+
+    @staticmethod
+    def record(scope, status: int, elapsed: float, stats: QueryStats):
+        # The route template keeps label values bounded (/v1/blog/{post_id}
+        # rather than one series per post id)
+        route = getattr(scope.get("route"), "path", "unmatched")
+        method = scope["method"]
+        http_request_duration.labels(method, route, str(status)).observe(
+            elapsed
+        )
+        http_request_db_queries.labels(method, route).observe(stats.count)
+        http_request_db_duration.labels(method, route).observe(stats.seconds)
+        statement, repeats = stats.most_repeated()
+        if repeats > N_PLUS_ONE_THRESHOLD:
+            http_request_n_plus_one.inc(method, route)
+            logger.warning(
+                "Possible N+1 queries on %s %s: %d x %s",
+                method, route, repeats, statement,
+            )
@@ -1,12 +1,22 @@
 # models.py
+from datetime import datetime, timezone
+
 from sqlalchemy import (
     Column, Integer, String, Text, ForeignKey, Boolean,
-    DateTime, func
+    DateTime, DDL, Index, column, event, func, table
 )
 from sqlalchemy.orm import relationship
 from src.database import Base
 
 
+def _utcnow() -> datetime:
+    # Second precision keeps the stored value identical across backends, so
+    # keyset cursors built from it compare exactly on SQLite and MySQL alike.
+    # Naive UTC is what both hand back on reads, so a post returned straight
+    # after its INSERT serializes the same as one loaded later.
+    return datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -14,9 +24,25 @@ class User(Base):
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password = Column(String(128), nullable=False)
-
-    posts = relationship("Post", back_populates="owner")
-    likes = relationship("Like", back_populates="user")
+    # Set when the account is deleted but its history is still being
+    # purged (see src/purge.py); a deleted account can't authenticate, and
+    # the purge resumes from it after a failure or restart.
+    deleted_at = Column(DateTime(timezone=True), index=True)
+
+    # The database removes a deleted user's posts and likes (ON DELETE
+    # CASCADE); passive_deletes stops the ORM loading them to do it itself.
+    posts = relationship(
+        "Post",
+        back_populates="owner",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    likes = relationship(
+        "Like",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
 
 class Post(Base):
@@ -27,27 +53,101 @@ class Post(Base):
     description = Column(Text)
     content = Column(Text)
     is_public = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    owner_id = Column(Integer, ForeignKey('users.id'))
+    # Every column with a server default also has a Python-side default, so
+    # the values are sent with the INSERT and the new row never has to be
+    # read back; only the id comes from the database (RETURNING/lastrowid).
+    # Maintained by the like/unlike endpoints so reads never COUNT(*) likes
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(
+        DateTime(timezone=True), default=_utcnow, server_default=func.now()
+    )
+    # Drives Last-Modified on cached post responses
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=_utcnow,
+        onupdate=_utcnow,
+        server_default=func.now(),
+    )
+    owner_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"))
     category_id = Column(Integer, ForeignKey('categories.id'))
     sub_category_id = Column(Integer, ForeignKey('sub_categories.id'))
 
     owner = relationship("User", back_populates="posts")
-    likes = relationship("Like", back_populates="post")
+    likes = relationship(
+        "Like",
+        back_populates="post",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     category = relationship("Category", back_populates="post")
     sub_category = relationship("SubCategory", back_populates="post")
 
+    # Keyset pagination seeks on (created_at, id), alone or behind each list
+    # filter. Index changes need a migration in migrations/versions too.
+    __table_args__ = (
+        Index("ix_posts_created", "created_at", "id"),
+        Index("ix_posts_public_created", "is_public", "created_at", "id"),
+        Index("ix_posts_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_posts_category_created", "category_id", "created_at", "id"),
+        Index(
+            "ix_posts_sub_category_created",
+            "sub_category_id", "created_at", "id",
+        ),
+        Index(
+            "ix_posts_fulltext", "title", "description", "content",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
+
+
+# SQLite (local and test databases) searches through an external-content
+# FTS5 table that triggers keep in step with posts.
+POSTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE posts_fts USING fts5("
+    "title, description, content, content='posts', content_rowid='id')",
+    "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    "END",
+    "CREATE TRIGGER posts_fts_update "
+    "AFTER UPDATE OF title, description, content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    "INSERT INTO posts_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+)
+posts_fts = table("posts_fts", column("rowid"))
+for _statement in POSTS_FTS_DDL:
+    event.listen(
+        Post.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    Post.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite"),
+)
+
 
 class Like(Base):
     __tablename__ = 'likes'
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    post_id = Column(Integer, ForeignKey('posts.id'))
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"))
+    post_id = Column(Integer, ForeignKey('posts.id', ondelete="CASCADE"))
 
     user = relationship("User", back_populates="likes")
     post = relationship("Post", back_populates="likes")
 
+    __table_args__ = (
+        Index("uq_likes_post_user", "post_id", "user_id", unique=True),
+        Index("ix_likes_user", "user_id"),
+    )
+
 
 class Category(Base):
     __tablename__ = 'categories'
@@ -0,0 +1,53 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: int | None) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _encode(key: list) -> str:
+    raw = json.dumps(key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    return _encode([created_at.isoformat(), post_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode an opaque cursor back into its ``(created_at, id)`` key.
+
+    Raises ``ValueError`` for anything that was not produced by
+    ``encode_cursor``.
+    """
+    try:
+        created_at, post_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_rank_cursor(rank: float, post_id: int) -> str:
+    return _encode([rank, post_id])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a search cursor back into its ``(rank, id)`` key."""
+    try:
+        rank, post_id = _decode(cursor)
+        return float(rank), int(post_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
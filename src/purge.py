@@ -0,0 +1,144 @@
+# purge.py
+import logging
+import os
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.like import lock_posts
+from src.catalog import catalog
+from src.database import AsyncSessionLocal
+from src.models import Like, Post, User
+from src.response_cache import invalidate_all_posts, invalidate_posts
+
+logger = logging.getLogger(__name__)
+
+# Accounts with more posts or more likes than this are emptied by a
+# background job in batches of ACCOUNT_PURGE_BATCH_SIZE, one transaction
+# each, instead of cascading everything inside the DELETE request.
+ACCOUNT_PURGE_THRESHOLD = int(os.getenv("ACCOUNT_PURGE_THRESHOLD", "1000"))
+ACCOUNT_PURGE_BATCH_SIZE = int(os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "500"))
+# Finish purges cut short by a failure or restart when the app starts
+ACCOUNT_PURGE_RESUME = os.getenv(
+    "ACCOUNT_PURGE_RESUME", "true"
+).lower() in ("1", "true", "yes")
+
+
+async def _release_likes(db: AsyncSession, user_id: int, *criteria) -> None:
+    # The posts the user liked are locked before their likes are deleted,
+    # as liking does (see lock_posts). The unique (post_id, user_id) index
+    # means one like per post, so each loses exactly one from its counter.
+    liked = Post.id.in_(
+        select(Like.post_id).where(Like.user_id == user_id, *criteria)
+    )
+    await db.execute(lock_posts(liked))
+    await db.execute(
+        update(Post).where(liked).values(like_count=Post.like_count - 1)
+    )
+
+
+async def _more_than_threshold(db: AsyncSession, query) -> bool:
+    # Probes a single index entry rather than counting every row
+    beyond = await db.scalar(query.offset(ACCOUNT_PURGE_THRESHOLD).limit(1))
+    return beyond is not None
+
+
+async def needs_purge(db: AsyncSession, user_id: int) -> bool:
+    """Whether the user owns more than ``ACCOUNT_PURGE_THRESHOLD`` posts or
+    has liked more than that many."""
+    return await _more_than_threshold(
+        db, select(Post.id).where(Post.owner_id == user_id)
+    ) or await _more_than_threshold(
+        db, select(Like.id).where(Like.user_id == user_id)
+    )
+
+
+async def delete_user(db: AsyncSession, user_id: int) -> None:
+    """Delete a user; the database cascades to their posts and likes."""
+    await _release_likes(db, user_id)
+    await db.execute(delete(User).where(User.id == user_id))
+    await db.commit()
+    await invalidate_all_posts()
+    catalog.invalidate_tree()
+
+
+async def retire_user(db: AsyncSession, user_id: int) -> None:
+    """Take the account out of use until ``purge_user`` removes it.
+
+    ``deleted_at`` locks the account (``load_user`` refuses it) and marks
+    the purge as pending. The email is replaced so nobody can log in with
+    it and the address can be registered again straight away.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            email=f"deleted-{user_id}@deleted.invalid",
+            deleted_at=func.now(),
+        )
+    )
+    await db.commit()
+
+
+async def purge_user(db: AsyncSession, user_id: int) -> None:
+    """Delete a retired user's likes and posts a batch at a time, then the
+    user.
+
+    Runs as a background task after the response is sent, when the
+    request's session has already been closed; it is reused here and
+    closed again at the end. Every batch commits on its own, so after a
+    failure (logged here) ``resume_purges`` picks up where it stopped.
+    """
+    try:
+        while True:
+            result = await db.scalars(
+                select(Like.post_id)
+                .where(Like.user_id == user_id)
+                .limit(ACCOUNT_PURGE_BATCH_SIZE)
+            )
+            post_ids = result.all()
+            if not post_ids:
+                break
+            in_batch = Like.post_id.in_(post_ids)
+            await _release_likes(db, user_id, in_batch)
+            await db.execute(
+                delete(Like).where(Like.user_id == user_id, in_batch)
+            )
+            await db.commit()
+            await invalidate_posts(*post_ids)
+        while True:
+            result = await db.scalars(
+                select(Post.id)
+                .where(Post.owner_id == user_id)
+                .limit(ACCOUNT_PURGE_BATCH_SIZE)
+            )
+            post_ids = result.all()
+            if not post_ids:
+                break
+            # Likes on these posts go with them (ON DELETE CASCADE)
+            await db.execute(delete(Post).where(Post.id.in_(post_ids)))
+            await db.commit()
+            await invalidate_posts(*post_ids)
+        await delete_user(db, user_id)
+    except Exception:
+        logger.exception(
+            "Purge of user %s failed; it resumes on the next start", user_id
+        )
+    finally:
+        await db.close()
+
+
+async def resume_purges() -> None:
+    """Finish purging every retired user, e.g. after a restart."""
+    try:
+        async with AsyncSessionLocal() as db:
+            user_ids = (
+                await db.scalars(
+                    select(User.id).where(User.deleted_at.is_not(None))
+                )
+            ).all()
+    except Exception:
+        logger.exception("Could not look for interrupted account purges")
+        return
+    for user_id in user_ids:
+        await purge_user(AsyncSessionLocal(), user_id)
@@ -0,0 +1,172 @@
+# ratelimit.py
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+
+@dataclass(frozen=True)
+class Rate:
+    """Bursts of up to ``capacity`` requests, refilled evenly over
+    ``seconds``."""
+
+    capacity: int
+    seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.seconds
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Rate"]:
+        """``"10/60"`` is ten requests a minute; ``""`` or ``"0"`` is no
+        limit. Any other count or window must be positive, else
+        ``ValueError``."""
+        value = value.strip()
+        if value in ("", "0"):
+            return None
+        capacity, _, seconds = value.partition("/")
+        rate = cls(int(capacity), float(seconds or 1))
+        if rate.capacity <= 0 or rate.seconds <= 0:
+            raise ValueError(f"Invalid rate limit {value!r}")
+        return rate
+
+
+def _parse_route_rates(value: str) -> dict[str, Optional[Rate]]:
+    rates = {}
+    for entry in value.split(";"):
+        if entry.strip():
+            route, _, rate = entry.rpartition("=")
+            rates[" ".join(route.split())] = Rate.parse(rate)
+    return rates
+
+
+# Kill switch for every limit below
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in (
+    "1", "true", "yes",
+)
+# Each login attempt costs a bcrypt verify, so attempts are limited per
+# client IP and per account (the submitted username), and sign-ups per IP.
+RATE_LIMIT_LOGIN_PER_IP = Rate.parse(
+    os.getenv("RATE_LIMIT_LOGIN_PER_IP", "20/60")
+)
+RATE_LIMIT_LOGIN_PER_ACCOUNT = Rate.parse(
+    os.getenv("RATE_LIMIT_LOGIN_PER_ACCOUNT", "5/60")
+)
+RATE_LIMIT_REGISTER_PER_IP = Rate.parse(
+    os.getenv("RATE_LIMIT_REGISTER_PER_IP", "10/60")
+)
+# Per client IP on every route (off by default), with per-route overrides
+# as "METHOD /path/template=count/seconds" separated by semicolons.
+RATE_LIMIT_PER_ROUTE = Rate.parse(os.getenv("RATE_LIMIT_PER_ROUTE", "0"))
+RATE_LIMIT_ROUTES = _parse_route_rates(os.getenv("RATE_LIMIT_ROUTES", ""))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class RateLimitBackend(ABC):
+    """Interface for token-bucket state shared by the API.
+
+    A networked backend (e.g. a Redis script) can be dropped in so that
+    every worker process draws from the same buckets.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: Rate) -> float:
+        """Take a token from ``key``'s bucket. Returns 0 on success, else
+        the seconds until a token will be available."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets local to one process, the least recently used dropped first.
+
+    A dropped bucket starts over full, so ``max_size`` should exceed the
+    callers active within the longest limit window.
+    """
+
+    def __init__(self, max_size: int = RATE_LIMIT_MAX_KEYS):
+        self.max_size = max_size
+        # key -> (tokens left, monotonic time they were counted)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, rate: Rate) -> float:
+        now = time.monotonic()
+        tokens, counted_at = self._buckets.get(key, (rate.capacity, now))
+        tokens = min(
+            rate.capacity,
+            tokens + (now - counted_at) * rate.refill_per_second,
+        )
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate.refill_per_second
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_size:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+rate_limit_backend: RateLimitBackend = InMemoryRateLimitBackend()
+
+
+def configure_rate_limit_backend(backend: RateLimitBackend) -> None:
+    global rate_limit_backend
+    rate_limit_backend = backend
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers (and
+    # --forwarded-allow-ips) so this is the original client
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(key: str, rate: Optional[Rate]) -> None:
+    """Spend a token from ``key``'s bucket or answer 429."""
+    if not RATE_LIMIT_ENABLED or rate is None:
+        return
+    wait = await rate_limit_backend.take(key, rate)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+class RateLimiter:
+    """A named limit; as a dependency it is applied per client IP."""
+
+    def __init__(self, name: str, rate: Optional[Rate]):
+        self.name = name
+        self.rate = rate
+
+    async def hit(self, key: str) -> None:
+        await enforce(f"{self.name}:{key}", self.rate)
+
+    async def __call__(self, request: Request) -> None:
+        await self.hit(client_ip(request))
+
+
+async def limit_route(request: Request) -> None:
+    """Application-wide dependency: per-IP limit of the matched route."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    route = f"{request.method} {request.scope['route'].path}"
+    rate = RATE_LIMIT_ROUTES.get(route, RATE_LIMIT_PER_ROUTE)
+    await enforce(f"route:{route}:{client_ip(request)}", rate)
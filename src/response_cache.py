@@ -0,0 +1,148 @@
+# response_cache.py
+import hashlib
+import os
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from src.cache import CacheBackend, InMemoryCache
+
+# With the in-process backend each worker caches on its own, so the TTL
+# bounds how stale another worker's copy can be after a write.
+POST_CACHE_TTL_SECONDS = float(os.getenv("POST_CACHE_TTL_SECONDS", "60"))
+POST_CACHE_MAX_SIZE = int(os.getenv("POST_CACHE_MAX_SIZE", "10000"))
+# List pages hold up to 100 full posts each, so entries are bounded by
+# their total JSON size as well as by count.
+POST_CACHE_MAX_BYTES = int(
+    os.getenv("POST_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+
+post_cache: CacheBackend = InMemoryCache(
+    max_size=POST_CACHE_MAX_SIZE,
+    ttl=POST_CACHE_TTL_SECONDS,
+    max_bytes=POST_CACHE_MAX_BYTES,
+)
+
+_GENERATION_KEY = "posts:generation"
+
+
+def configure_post_cache(backend: CacheBackend) -> None:
+    global post_cache
+    post_cache = backend
+
+
+def post_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def _new_generation() -> dict:
+    return {
+        "token": uuid.uuid4().hex,
+        "modified_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _viewer_generation_key(user_id: int) -> str:
+    return f"{_GENERATION_KEY}:{user_id}"
+
+
+async def _generation(key: str) -> dict:
+    generation = await post_cache.get(key)
+    if generation is None:
+        generation = _new_generation()
+        await post_cache.set(key, generation)
+    return generation
+
+
+async def list_generation() -> dict:
+    """Token that changes whenever any post changes, and when it did.
+
+    List pages are cached under the current token, so a write invalidates
+    them all at once without having to find them. A random token (rather
+    than a counter) stays safe if the backend evicts it; a replacement's
+    ``modified_at`` is later than any write it stands for.
+    """
+    return await _generation(_GENERATION_KEY)
+
+
+async def viewer_generation(user_id: int) -> dict:
+    """Like ``list_generation``, for the pages one user sees: it changes
+    when they like or unlike a post."""
+    return await _generation(_viewer_generation_key(user_id))
+
+
+async def cached_response(db, key: str) -> Optional[Any]:
+    """``key``'s entry, unless ``db`` belongs to a caller who must see
+    their own recent writes (see ``get_read_db``).
+
+    Entries may have been filled from a lagging replica; such a caller
+    reads the primary instead, and storing that result refreshes them.
+    """
+    if db.info.get("pinned_to_primary"):
+        return None
+    return await post_cache.get(key)
+
+
+async def invalidate_posts(*post_ids: int) -> None:
+    for post_id in post_ids:
+        await post_cache.delete(post_key(post_id))
+    await post_cache.set(_GENERATION_KEY, _new_generation())
+
+
+async def invalidate_likes(user_id: int, *post_ids: int) -> None:
+    """Forget what a like or unlike changed without dropping every list
+    page: the posts themselves and the liker's own pages. Other viewers'
+    pages keep their like counts until they expire."""
+    for post_id in post_ids:
+        await post_cache.delete(post_key(post_id))
+    await post_cache.set(_viewer_generation_key(user_id), _new_generation())
+
+
+async def invalidate_all_posts() -> None:
+    """Forget every cached post, e.g. after a category rename."""
+    await post_cache.clear()
+
+
+def make_etag(content: bytes) -> str:
+    return '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+
+def _not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime]
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(
+    request: Request,
+    content: bytes,
+    last_modified: Optional[datetime] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """Send JSON ``content`` with a strong ETag, answering 304 on a match."""
+    headers = dict(headers or {}, ETag=make_etag(content))
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    if _not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=content, media_type="application/json", headers=headers
+    )
@@ -1,5 +1,5 @@
 # schemas.py
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional
 from datetime import datetime
 
@@ -13,11 +13,29 @@ class UserCreate(UserBase):
     password: str
 
 
+class UserUpdate(BaseModel):
+    """Sparse account ``PATCH`` body; only the fields sent are written."""
+
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+
+    @field_validator("name", "email", "password")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
 class UserResponse(UserBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PostBase(BaseModel):
@@ -33,15 +51,93 @@ class PostCreate(PostBase):
     pass
 
 
+class PostUpdate(BaseModel):
+    """Sparse post ``PATCH`` body; only the fields sent are written."""
+
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    is_public: Optional[bool] = None
+    category_id: Optional[int] = None
+    sub_category_id: Optional[int] = None
+
+    @field_validator(
+        "title", "content", "is_public", "category_id", "sub_category_id"
+    )
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
 class PostResponse(PostBase):
     id: int
     created_at: datetime
     owner_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PostGetResponse(PostResponse):
     category_name: Optional[str] = None
     sub_category_name: Optional[str] = None
+    like_count: int = 0
+    liked_by_me: bool = False
+
+
+class PostIds(BaseModel):
+    post_ids: list[int] = Field(..., min_length=1, max_length=100)
+
+
+class PostListItem(BaseModel):
+    """A ``GET /v1/blog`` entry; only the projected ``fields`` are set."""
+
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    is_public: Optional[bool] = None
+    category_id: Optional[int] = None
+    sub_category_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    owner_id: Optional[int] = None
+    category_name: Optional[str] = None
+    sub_category_name: Optional[str] = None
+    like_count: Optional[int] = None
+    liked_by_me: Optional[bool] = None
+
+
+class CategoryBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class CategoryCreate(CategoryBase):
+    pass
+
+
+class CategoryResponse(CategoryBase):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SubCategoryCreate(CategoryBase):
+    pass
+
+
+class SubCategoryResponse(CategoryBase):
+    id: int
+    category_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SubCategoryTree(BaseModel):
+    id: int
+    name: str
+    post_count: int
+
+
+class CategoryTree(SubCategoryTree):
+    sub_categories: list[SubCategoryTree]
@@ -0,0 +1,39 @@
+# settings.py
+from dataclasses import dataclass
+
+from src import auth, database, purge, ratelimit, response_cache
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Everything ``create_app`` sets up at startup.
+
+    Defaults come from the environment variables read by each module, so
+    ``Settings()`` describes the deployment and tests override fields.
+    """
+
+    database_url: str = database.ASYNC_SQLALCHEMY_DATABASE_URL
+    pool_size: int = database.DB_POOL_SIZE
+    max_overflow: int = database.DB_MAX_OVERFLOW
+    pool_timeout: float = database.DB_POOL_TIMEOUT
+    pool_recycle: int = database.DB_POOL_RECYCLE
+    pool_pre_ping: bool = database.DB_POOL_PRE_PING
+    replica_urls: tuple[str, ...] = database.DB_REPLICA_URLS
+    read_your_writes_seconds: float = database.DB_READ_YOUR_WRITES_SECONDS
+    user_cache_ttl_seconds: float = auth.USER_CACHE_TTL_SECONDS
+    user_cache_max_size: int = auth.USER_CACHE_MAX_SIZE
+    post_cache_ttl_seconds: float = response_cache.POST_CACHE_TTL_SECONDS
+    post_cache_max_size: int = response_cache.POST_CACHE_MAX_SIZE
+    post_cache_max_bytes: int = response_cache.POST_CACHE_MAX_BYTES
+    rate_limit_max_keys: int = ratelimit.RATE_LIMIT_MAX_KEYS
+    resume_account_purges: bool = purge.ACCOUNT_PURGE_RESUME
+
+    @property
+    def pool_options(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
@@ -1,45 +1,80 @@
 # tests/conftest.py
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from src.database import Base, get_db
-from src.main import app
-
-# Use a separate SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine
+import os
+
+# Minimum bcrypt cost keeps account fixtures fast; set before src is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src import database  # noqa: E402
+from src.database import Base  # noqa: E402
+from src.main import create_app  # noqa: E402
+from src.models import Category, SubCategory  # noqa: E402
+from src.settings import Settings  # noqa: E402
+
+# Use a separate SQLite database for testing; every test resets its schema,
+# so there is never an interrupted account purge to resume
+TEST_SETTINGS = Settings(
+    database_url="sqlite+aiosqlite:///./test.db", resume_account_purges=False
 )
 
 
-@pytest.fixture(scope="session")
-def db_engine():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    return engine
+async def reset_schema():
+    async with database.get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture(scope="function")
+def client():
+    # Each test gets its own app: the lifespan handler creates a fresh
+    # engine and empty caches, and disposes of the engine afterwards. A
+    # single portal keeps every request (and the aiosqlite connections in
+    # the pool) on one event loop for the duration of the test.
+    with TestClient(create_app(TEST_SETTINGS)) as client:
+        client.portal.call(reset_schema)
+        yield client
+
+
+@pytest.fixture(scope="function")
+def run_db(client):
+    """Run ``fn(session)`` against the test database and return its result."""
+
+    def run(fn):
+        async def call():
+            async with database.AsyncSessionLocal() as db:
+                return await fn(db)
+
+        return client.portal.call(call)
+
+    return run
 
 
 @pytest.fixture(scope="function")
-def db(db_engine):
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
-    yield session
-    session.close()
-    transaction.rollback()
-    connection.close()
+def category(run_db):
+    async def seed(db):
+        cat = Category(name="Tech")
+        db.add(cat)
+        await db.flush()
+        sub_cat = SubCategory(name="Python", category_id=cat.id)
+        db.add(sub_cat)
+        await db.commit()
+        return cat.id, sub_cat.id
+
+    return run_db(seed)
 
 
 @pytest.fixture(scope="function")
-def client(db):
-    def override_get_db():
-        yield db
+def query_counter(client):
+    """Collect every SQL statement issued against the test database."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
 
-    app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
-    app.dependency_overrides.clear()
+    engine = database.get_engine().sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
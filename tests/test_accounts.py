@@ -1,4 +1,10 @@
 # tests/test_accounts.py
+from sqlalchemy import func, select
+
+from src import auth, purge
+from src.models import Like, Post, User
+
+
 def test_create_account(client):
     response = client.post(
         "/v1/accounts",
@@ -140,3 +146,270 @@ def test_login_invalid_credentials(client):
     )
     assert res.status_code == 401
     assert res.json()["detail"] == "Invalid credentials"
+
+
+def test_create_account_does_not_reload_row(client, query_counter):
+    query_counter.clear()
+    res = client.post(
+        "/v1/accounts",
+        json={"name": "Once", "email": "once@example.com", "password": "pw"},
+    )
+    assert res.json()["id"]
+    # The duplicate-email check and the INSERT; nothing read back after it
+    assert [s.split()[0] for s in query_counter] == ["SELECT", "INSERT"]
+
+
+def test_account_update_does_not_reload_row(client, query_counter):
+    token = register_and_login(client, "noreload@example.com")
+    query_counter.clear()
+    res = client.put(
+        "/v1/accounts",
+        json={
+            "name": "Renamed",
+            "email": "noreload@example.com",
+            "password": "newpass123",
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.json()["name"] == "Renamed"
+    assert query_counter[-1].startswith("UPDATE users")
+
+
+def test_account_patch_only_writes_sent_fields(client, query_counter):
+    token = register_and_login(client, "patch@example.com", "keepme")
+    query_counter.clear()
+    res = client.patch(
+        "/v1/accounts",
+        json={"name": "Patched"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.json() == {
+        "id": res.json()["id"],
+        "name": "Patched",
+        "email": "patch@example.com",
+    }
+    updates = [s for s in query_counter if s.startswith("UPDATE")]
+    assert len(updates) == 1
+    assignments = updates[0].split("WHERE")[0]
+    assert "password" not in assignments and "email" not in assignments
+
+    # The password was not rehashed, so the old one still works
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": "patch@example.com", "password": "keepme"},
+    )
+    assert res.status_code == 200
+
+
+def test_account_patch_password(client):
+    token = register_and_login(client, "patchpw@example.com", "oldpass")
+    client.patch(
+        "/v1/accounts",
+        json={"password": "newpass"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": "patchpw@example.com", "password": "newpass"},
+    )
+    assert res.status_code == 200
+
+
+def test_account_patch_rejects_bad_bodies(client):
+    token = register_and_login(client, "patchbad@example.com")
+    register_and_login(client, "taken@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.patch("/v1/accounts", json={}, headers=headers).json() == {
+        "detail": "No fields to update"
+    }
+    res = client.patch("/v1/accounts", json={"name": None}, headers=headers)
+    assert res.status_code == 422
+    res = client.patch(
+        "/v1/accounts", json={"email": "taken@example.com"}, headers=headers
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Email already registered"
+
+
+def add_post(client, token, category, title="Post"):
+    res = client.post(
+        "/v1/blog",
+        json={
+            "title": title,
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return res.json()["id"]
+
+
+def count_rows(run_db, model):
+    async def count(db):
+        return await db.scalar(select(func.count()).select_from(model))
+
+    return run_db(count)
+
+
+def test_account_delete_cascades(client, category, run_db, query_counter):
+    leaving = register_and_login(client, "leaving@example.com")
+    staying = register_and_login(client, "staying@example.com")
+    leaving_post = add_post(client, leaving, category)
+    staying_post = add_post(client, staying, category)
+    client.post(
+        f"/v1/like/{staying_post}",
+        headers={"Authorization": f"Bearer {leaving}"},
+    )
+    client.post(
+        f"/v1/like/{leaving_post}",
+        headers={"Authorization": f"Bearer {staying}"},
+    )
+
+    query_counter.clear()
+    res = client.delete(
+        "/v1/accounts", headers={"Authorization": f"Bearer {leaving}"}
+    )
+    assert res.status_code == 200
+    # Size check, like counters, the DELETE: nothing proportional to history
+    writes = [s for s in query_counter if not s.startswith("SELECT")]
+    assert len(writes) == 2
+
+    assert count_rows(run_db, Post) == 1
+    assert count_rows(run_db, Like) == 0
+    res = client.get(
+        f"/v1/blog/{staying_post}",
+        headers={"Authorization": f"Bearer {staying}"},
+    )
+    assert res.json()["like_count"] == 0
+
+
+def test_account_delete_purges_large_history(
+    client, category, run_db, monkeypatch
+):
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_THRESHOLD", 2)
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_BATCH_SIZE", 2)
+    token = register_and_login(client, "prolific@example.com", "secret")
+    for i in range(5):
+        add_post(client, token, category, f"Post {i}")
+
+    res = client.delete(
+        "/v1/accounts", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200
+    # TestClient runs background tasks before returning
+    assert count_rows(run_db, Post) == 0
+    assert count_rows(run_db, User) == 0
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": "prolific@example.com", "password": "secret"},
+    )
+    assert res.status_code == 401
+
+
+def test_retired_account_cannot_log_in(client, category, run_db):
+    register_and_login(client, "retired@example.com", "secret")
+    tokens = client.post(
+        "/v1/accounts/login",
+        data={"username": "retired@example.com", "password": "secret"},
+    ).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    user_id = client.get("/v1/me", headers=headers).json()["id"]
+
+    async def retire(db):
+        await purge.retire_user(db, user_id)
+
+    run_db(retire)
+    # delete_account drops the cached user along with retiring it
+    client.portal.call(auth.invalidate_user, user_id)
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": "retired@example.com", "password": "secret"},
+    )
+    assert res.status_code == 401
+    # Tokens issued before the account was deleted stop working too
+    res = client.post(
+        "/v1/blog",
+        json={
+            "title": "Too late",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    )
+    assert res.status_code == 401
+    res = client.patch(
+        "/v1/accounts", json={"name": "Back"}, headers=headers
+    )
+    assert res.status_code == 401
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert res.status_code == 401
+    res = client.post(
+        "/v1/accounts",
+        json={"name": "New", "email": "retired@example.com", "password": "x"},
+    )
+    assert res.status_code == 200
+
+
+def test_account_delete_purges_many_likes(
+    client, category, run_db, monkeypatch
+):
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_THRESHOLD", 2)
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_BATCH_SIZE", 2)
+    author = register_and_login(client, "liked-author@example.com")
+    fan = register_and_login(client, "eager-fan@example.com")
+    post_ids = [
+        add_post(client, author, category, f"Post {i}") for i in range(5)
+    ]
+    client.post(
+        "/v1/likes",
+        json={"post_ids": post_ids},
+        headers={"Authorization": f"Bearer {fan}"},
+    )
+
+    async def counts(db):
+        return (await db.scalars(select(Post.like_count))).all()
+
+    # No posts, but more likes than the threshold: purged in batches
+    res = client.delete(
+        "/v1/accounts", headers={"Authorization": f"Bearer {fan}"}
+    )
+    assert res.status_code == 200
+    assert count_rows(run_db, Like) == 0
+    assert count_rows(run_db, User) == 1
+    assert run_db(counts) == [0] * 5
+
+
+def test_interrupted_purge_resumes(client, category, run_db, monkeypatch):
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_THRESHOLD", 1)
+    monkeypatch.setattr(purge, "ACCOUNT_PURGE_BATCH_SIZE", 1)
+    token = register_and_login(client, "interrupted@example.com")
+    for i in range(3):
+        add_post(client, token, category, f"Post {i}")
+
+    calls = []
+    invalidate_posts = purge.invalidate_posts
+
+    async def fail_once(*post_ids):
+        calls.append(post_ids)
+        if len(calls) == 2:
+            raise ConnectionError("cache went away")
+        await invalidate_posts(*post_ids)
+
+    monkeypatch.setattr(purge, "invalidate_posts", fail_once)
+    res = client.delete(
+        "/v1/accounts", headers={"Authorization": f"Bearer {token}"}
+    )
+    # The failure is logged, not raised; the account stays retired
+    assert res.status_code == 200
+    assert count_rows(run_db, Post) == 1
+    assert count_rows(run_db, User) == 1
+
+    client.portal.call(purge.resume_purges)
+    assert count_rows(run_db, Post) == 0
+    assert count_rows(run_db, User) == 0
@@ -1,10 +1,23 @@
 # test_auth.py
+import asyncio
 import os
+import time
 from datetime import timedelta
 
 import jwt
+import pytest
+from sqlalchemy import update
 
-from src.auth import create_access_token, get_password_hash, verify_password
+from src import auth
+from src.auth import (
+    create_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+from src.cache import CacheBackend, ExpiringCache, InMemoryCache
+from src.models import User
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
@@ -60,3 +73,287 @@ def test_token_with_nonexistent_user(client):
     res = client.get("/v1/me", headers={"Authorization": f"Bearer {token}"})
     assert res.status_code == 401
     assert res.json()["detail"] == "Could not validate credentials"
+
+
+def test_password_hash_uses_configured_rounds():
+    from src.auth import BCRYPT_ROUNDS
+
+    hashed = get_password_hash("test123")
+    assert hashed.split("$")[2] == f"{BCRYPT_ROUNDS:02d}"
+
+
+def test_async_password_hash_and_verify():
+    async def roundtrip():
+        hashed = await get_password_hash_async("test123")
+        return (
+            await verify_password_async("test123", hashed),
+            await verify_password_async("wrongpass", hashed),
+        )
+
+    assert asyncio.run(roundtrip()) == (True, False)
+
+
+def test_password_pool_saturated(client, monkeypatch):
+    monkeypatch.setattr(
+        auth, "_hash_pending",
+        auth.PASSWORD_HASH_WORKERS + auth.PASSWORD_HASH_QUEUE_LIMIT,
+    )
+    res = client.post(
+        "/v1/accounts",
+        json={
+            "name": "Busy",
+            "email": "busy@example.com",
+            "password": "busypass",
+        },
+    )
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def register_and_login(client, email, password="cachepass"):
+    client.post(
+        "/v1/accounts",
+        json={"name": "Cached", "email": email, "password": password},
+    )
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": email, "password": password},
+    )
+    return res.json()["access_token"]
+
+
+def rename_user_in_db(run_db, email, name):
+    async def rename(db):
+        await db.execute(
+            update(User).where(User.email == email).values(name=name)
+        )
+        await db.commit()
+
+    run_db(rename)
+
+
+def test_current_user_served_from_cache(client, run_db):
+    token = register_and_login(client, "cache@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/v1/me", headers=headers).json()["name"] == "Cached"
+
+    rename_user_in_db(run_db, "cache@example.com", "Changed behind cache")
+    assert client.get("/v1/me", headers=headers).json()["name"] == "Cached"
+
+
+def test_update_account_invalidates_user_cache(client):
+    token = register_and_login(client, "invalidate@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/v1/me", headers=headers)
+    client.put(
+        "/v1/accounts",
+        json={
+            "name": "Renamed",
+            "email": "invalidate@example.com",
+            "password": "cachepass",
+        },
+        headers=headers,
+    )
+    assert client.get("/v1/me", headers=headers).json()["name"] == "Renamed"
+
+
+def test_delete_account_invalidates_user_cache(client):
+    token = register_and_login(client, "gone@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/v1/me", headers=headers)
+    client.delete("/v1/accounts", headers=headers)
+    assert client.get("/v1/me", headers=headers).status_code == 401
+
+
+def test_embedded_claims_skip_user_lookup(client, run_db, monkeypatch):
+    monkeypatch.setattr(auth, "JWT_EMBED_USER_CLAIMS", True)
+    token = register_and_login(client, "claims@example.com")
+    decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    assert decoded["email"] == "claims@example.com"
+
+    rename_user_in_db(run_db, "claims@example.com", "Not looked up")
+    res = client.get("/v1/me", headers={"Authorization": f"Bearer {token}"})
+    assert res.json()["name"] == "Cached"
+
+
+def test_in_memory_cache_lru_and_ttl():
+    async def exercise():
+        cache = InMemoryCache(max_size=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)  # evicts "b", the least recently used
+        values = [await cache.get(key) for key in "abc"]
+        await cache.set("d", 4, ttl=-1)  # already expired
+        return values + [await cache.get("d")]
+
+    assert asyncio.run(exercise()) == [1, None, 3, None]
+
+
+def test_partial_cache_backend_cannot_be_created():
+    class GetOnly(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_in_memory_cache_byte_budget():
+    async def exercise():
+        cache = InMemoryCache(max_size=100, max_bytes=30)
+        await cache.set("a", "x" * 10)  # 12 bytes of JSON
+        await cache.set("b", "y" * 10)
+        await cache.set("c", "z" * 10)  # over budget: evicts "a"
+        await cache.set("huge", "w" * 100)  # larger than the whole budget
+        return (
+            [await cache.get(key) is not None for key in ("a", "b", "c")],
+            await cache.get("huge"),
+            cache.size_bytes,
+        )
+
+    assert asyncio.run(exercise()) == ([False, True, True], None, 24)
+
+
+def login_tokens(client, email, password="refreshpass"):
+    client.post(
+        "/v1/accounts",
+        json={"name": "Refresher", "email": email, "password": password},
+    )
+    return client.post(
+        "/v1/accounts/login",
+        data={"username": email, "password": password},
+    ).json()
+
+
+def test_refresh_rotates_tokens(client, monkeypatch):
+    tokens = login_tokens(client, "rotate@example.com")
+
+    # Refreshing never touches bcrypt
+    def no_bcrypt(*args):
+        raise AssertionError("password hashed during refresh")
+
+    monkeypatch.setattr(auth, "verify_password", no_bcrypt)
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert res.status_code == 200
+    rotated = res.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    me = client.get(
+        "/v1/me",
+        headers={"Authorization": f"Bearer {rotated['access_token']}"},
+    )
+    assert me.json()["email"] == "rotate@example.com"
+
+
+def test_reused_refresh_token_ends_session(client):
+    tokens = login_tokens(client, "reuse@example.com")
+    rotated = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    ).json()
+
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert res.status_code == 401
+    assert res.json()["detail"] == "Invalid refresh token"
+    # The replay revoked the session, including the token it rotated to
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": rotated["refresh_token"]},
+    )
+    assert res.status_code == 401
+    me = client.get(
+        "/v1/me",
+        headers={"Authorization": f"Bearer {rotated['access_token']}"},
+    )
+    assert me.status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    tokens = login_tokens(client, "logout@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.post("/v1/accounts/logout", headers=headers).json() == {
+        "message": "Logged out"
+    }
+    assert client.get("/v1/me", headers=headers).status_code == 401
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert res.status_code == 401
+
+    # Other sessions of the same user are unaffected
+    other = client.post(
+        "/v1/accounts/login",
+        data={"username": "logout@example.com", "password": "refreshpass"},
+    ).json()
+    me = client.get(
+        "/v1/me", headers={"Authorization": f"Bearer {other['access_token']}"}
+    )
+    assert me.status_code == 200
+
+
+def test_token_types_are_not_interchangeable(client):
+    tokens = login_tokens(client, "types@example.com")
+    me = client.get(
+        "/v1/me",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+    assert me.status_code == 401
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["access_token"]},
+    )
+    assert res.status_code == 401
+
+
+def test_in_memory_cache_add_only_when_absent():
+    async def exercise():
+        cache = InMemoryCache()
+        first = await cache.add("jti", True)
+        second = await cache.add("jti", True)
+        await cache.set("expired", True, ttl=-1)
+        return first, second, await cache.add("expired", True)
+
+    assert asyncio.run(exercise()) == (True, False, True)
+
+
+def test_expiring_cache_drops_entries_only_by_ttl():
+    async def exercise():
+        cache = ExpiringCache()
+        for i in range(5000):
+            await cache.set(f"kept{i}", True, ttl=60)
+        await cache.set("brief", True, ttl=0.01)
+        await cache.set("renewed", 1, ttl=0.01)
+        await cache.set("renewed", 2, ttl=60)
+        await asyncio.sleep(0.02)
+        await cache.set("next", True, ttl=60)  # purges what has expired
+        kept, renewed = await cache.get("kept0"), await cache.get("renewed")
+        return len(cache), kept, renewed
+
+    assert asyncio.run(exercise()) == (5002, True, 2)
+
+
+def test_logged_out_session_outlasts_many_spent_tokens(client):
+    tokens = login_tokens(client, "busy@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    client.post("/v1/accounts/logout", headers=headers)
+
+    async def spend_many():
+        expires = time.time() + 3600
+        for i in range(20000):
+            await auth.spend_refresh_token({"jti": f"t{i}", "exp": expires})
+
+    client.portal.call(spend_many)
+    assert len(auth.spent_refresh_tokens) == 20000
+    assert client.get("/v1/me", headers=headers).status_code == 401
+    res = client.post(
+        "/v1/accounts/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert res.status_code == 401
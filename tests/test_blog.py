@@ -1,4 +1,10 @@
 # tests/test_blog.py
+import json
+from email.utils import parsedate_to_datetime
+
+from src.api.v1 import blog
+
+
 def create_and_auth_user(
     client, email="author@example.com", password="authorpass"
 ):
@@ -33,6 +39,26 @@ def test_create_blog(client):
     assert response.json()["title"] == "Test Blog"
 
 
+def test_created_post_matches_later_reads(client, category):
+    token = create_and_auth_user(client, "format@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post(
+        "/v1/blog",
+        json={
+            "title": "Formats",
+            "content": "Same timestamps",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    ).json()
+
+    read = client.get(f"/v1/blog/{created['id']}", headers=headers).json()
+    assert read["created_at"] == created["created_at"]
+    listed = client.get("/v1/blog", headers=headers).json()
+    assert listed[0]["created_at"] == created["created_at"]
+
+
 def test_get_blog_by_id(client):
     token = create_and_auth_user(client, "reader@example.com", "readpass")
     create_res = client.post(
@@ -209,3 +235,569 @@ def test_delete_unauthorized_post(client):
     )
     assert del_res.status_code == 403
     assert del_res.json()["detail"] == "Not authorized"
+
+
+def create_posts(client, token, category, count, **extra):
+    category_id, sub_category_id = category
+    ids = []
+    for i in range(count):
+        res = client.post(
+            "/v1/blog",
+            json={
+                "title": f"Post {i}",
+                "description": "desc",
+                "content": "content " * 50,
+                "is_public": True,
+                "category_id": category_id,
+                "sub_category_id": sub_category_id,
+                **extra,
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        ids.append(res.json()["id"])
+    return ids
+
+
+def test_get_all_blogs_cursor_pagination(client, category):
+    token = create_and_auth_user(client, "pager@example.com")
+    ids = create_posts(client, token, category, 5)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen = []
+    res = client.get("/v1/blog?limit=2", headers=headers)
+    while True:
+        assert res.status_code == 200
+        assert len(res.json()) <= 2
+        seen.extend(item["id"] for item in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        res = client.get(f"/v1/blog?limit=2&cursor={cursor}", headers=headers)
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_get_all_blogs_limit_capped(client, category):
+    token = create_and_auth_user(client, "capped@example.com")
+    create_posts(client, token, category, 3)
+    res = client.get(
+        "/v1/blog?limit=100000",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 3
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_get_all_blogs_fields_projection(client, category):
+    token = create_and_auth_user(client, "fields@example.com")
+    create_posts(client, token, category, 1)
+    res = client.get(
+        "/v1/blog?fields=id,title,category_name",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    item = res.json()[0]
+    assert set(item) == {"id", "title", "category_name"}
+    assert item["category_name"] == "Tech"
+
+
+def test_get_all_blogs_unknown_field(client):
+    token = create_and_auth_user(client, "badfields@example.com")
+    res = client.get(
+        "/v1/blog?fields=id,password",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Unknown fields: password"
+
+
+def test_get_all_blogs_invalid_cursor(client):
+    token = create_and_auth_user(client, "badcursor@example.com")
+    res = client.get(
+        "/v1/blog?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Invalid cursor"
+
+
+def test_get_all_blogs_filters(client, category):
+    token1 = create_and_auth_user(client, "filter1@example.com")
+    token2 = create_and_auth_user(client, "filter2@example.com")
+    create_posts(client, token1, category, 2)
+    other_ids = create_posts(client, token2, category, 1)
+    owner_id = client.get(
+        "/v1/me", headers={"Authorization": f"Bearer {token2}"}
+    ).json()["id"]
+
+    res = client.get(
+        f"/v1/blog?owner_id={owner_id}&category_id={category[0]}",
+        headers={"Authorization": f"Bearer {token1}"},
+    )
+    assert [item["id"] for item in res.json()] == other_ids
+
+    res = client.get(
+        "/v1/blog?sub_category_id=9999",
+        headers={"Authorization": f"Bearer {token1}"},
+    )
+    assert res.json() == []
+
+
+def test_get_blog_etag_and_not_modified(client, category):
+    token = create_and_auth_user(client, "etag@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+
+    res = client.get(f"/v1/blog/{post_id}", headers=headers)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert res.headers["Last-Modified"]
+
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert res.status_code == 304
+    assert res.content == b""
+
+    res = client.get(
+        f"/v1/blog/{post_id}",
+        headers={
+            **headers,
+            "If-Modified-Since": res.headers["Last-Modified"],
+        },
+    )
+    assert res.status_code == 304
+
+
+def test_list_blogs_last_modified(client, category):
+    token = create_and_auth_user(client, "listlm@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    create_posts(client, token, category, 2)
+
+    res = client.get("/v1/blog", headers=headers)
+    assert res.status_code == 200
+    last_modified = res.headers["Last-Modified"]
+    res = client.get(
+        "/v1/blog", headers={**headers, "If-Modified-Since": last_modified}
+    )
+    assert res.status_code == 304
+
+    # The next write starts a new generation, never dated earlier
+    etag = res.headers["ETag"]
+    create_posts(client, token, category, 1)
+    res = client.get("/v1/blog", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert parsedate_to_datetime(
+        res.headers["Last-Modified"]
+    ) >= parsedate_to_datetime(last_modified)
+
+
+def test_get_blog_served_from_cache(client, category, query_counter):
+    token = create_and_auth_user(client, "cached@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+    client.get(f"/v1/blog/{post_id}", headers=headers)
+
+    query_counter.clear()
+    res = client.get(f"/v1/blog/{post_id}", headers=headers)
+    assert res.json()["id"] == post_id
+    # Only the per-caller liked_by_me lookup reaches the database
+    assert len(query_counter) == 1
+    assert "posts" not in query_counter[0]
+
+
+def test_update_blog_invalidates_cache(client, category):
+    token = create_and_auth_user(client, "stale@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+    first = client.get(f"/v1/blog/{post_id}", headers=headers)
+    listed = client.get("/v1/blog", headers=headers)
+
+    client.put(
+        f"/v1/blog/{post_id}",
+        json={
+            "title": "Fresh",
+            "content": "new",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    )
+    res = client.get(
+        f"/v1/blog/{post_id}",
+        headers={**headers, "If-None-Match": first.headers["ETag"]},
+    )
+    assert res.status_code == 200
+    assert res.json()["title"] == "Fresh"
+
+    res = client.get(
+        "/v1/blog",
+        headers={**headers, "If-None-Match": listed.headers["ETag"]},
+    )
+    assert res.status_code == 200
+    assert res.json()[0]["title"] == "Fresh"
+
+
+def test_like_keeps_other_viewers_list_pages(
+    client, category, query_counter
+):
+    author = create_and_auth_user(client, "likedlist@example.com")
+    fan = create_and_auth_user(client, "fan@example.com")
+    author_headers = {"Authorization": f"Bearer {author}"}
+    fan_headers = {"Authorization": f"Bearer {fan}"}
+    post_id = create_posts(client, author, category, 1)[0]
+    client.get("/v1/blog", headers=author_headers)
+    client.get("/v1/blog", headers=fan_headers)
+    client.get(f"/v1/blog/{post_id}", headers=author_headers)
+
+    client.post(f"/v1/like/{post_id}", headers=fan_headers)
+    # The liker's own page shows the like straight away...
+    res = client.get("/v1/blog", headers=fan_headers)
+    assert res.json()[0]["liked_by_me"] is True
+    assert res.json()[0]["like_count"] == 1
+    # ...as does the post itself
+    res = client.get(f"/v1/blog/{post_id}", headers=author_headers)
+    assert res.json()["like_count"] == 1
+
+    # Everybody else's pages stay cached
+    query_counter.clear()
+    res = client.get("/v1/blog", headers=author_headers)
+    assert res.json()[0]["like_count"] == 0
+    assert not any("FROM posts" in s for s in query_counter)
+
+
+def test_get_all_blogs_not_modified(client, category):
+    token = create_and_auth_user(client, "listetag@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    create_posts(client, token, category, 1)
+    etag = client.get("/v1/blog", headers=headers).headers["ETag"]
+
+    res = client.get("/v1/blog", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+
+    create_posts(client, token, category, 1)
+    res = client.get("/v1/blog", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+
+
+def test_private_post_not_served_from_cache(client, category):
+    owner = create_and_auth_user(client, "cacheowner@example.com")
+    post_id = create_posts(client, owner, category, 1, is_public=False)[0]
+    client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {owner}"}
+    )
+    intruder = create_and_auth_user(client, "cacheintruder@example.com")
+    res = client.get(
+        f"/v1/blog/{post_id}",
+        headers={"Authorization": f"Bearer {intruder}"},
+    )
+    assert res.status_code == 403
+
+
+def search(client, token, **params):
+    return client.get(
+        "/v1/blog/search",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_search_blogs_ranks_matches(client, category):
+    token = create_and_auth_user(client, "search@example.com")
+    create_posts(client, token, category, 1, title="Gardening basics")
+    strong = create_posts(
+        client, token, category, 1,
+        title="Async python", content="python asyncio python tips",
+    )[0]
+    weak = create_posts(
+        client, token, category, 1,
+        title="Cooking", content="a python recipe",
+    )[0]
+
+    res = search(client, token, q="python", fields="id,title")
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()] == [strong, weak]
+    assert set(res.json()[0]) == {"id", "title"}
+
+
+def test_search_blogs_visibility(client, category):
+    owner = create_and_auth_user(client, "searchowner@example.com")
+    private_id = create_posts(
+        client, owner, category, 1, title="Secret recipe", is_public=False
+    )[0]
+    other = create_and_auth_user(client, "searchother@example.com")
+
+    assert search(client, other, q="secret").json() == []
+    ids = [item["id"] for item in search(client, owner, q="secret").json()]
+    assert ids == [private_id]
+
+
+def test_search_blogs_pagination(client, category):
+    token = create_and_auth_user(client, "searchpages@example.com")
+    ids = create_posts(client, token, category, 5, title="Paged topic")
+
+    seen, params = [], {"q": "topic", "limit": 2}
+    while True:
+        res = search(client, token, **params)
+        seen.extend(item["id"] for item in res.json())
+        if "X-Next-Cursor" not in res.headers:
+            break
+        params["cursor"] = res.headers["X-Next-Cursor"]
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+
+def test_search_blogs_tracks_updates_and_deletes(client, category):
+    token = create_and_auth_user(client, "searchsync@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1, title="Original")[0]
+    client.put(
+        f"/v1/blog/{post_id}",
+        json={
+            "title": "Renamed",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    )
+    assert search(client, token, q="original").json() == []
+    assert len(search(client, token, q="renamed").json()) == 1
+
+    client.delete(f"/v1/blog/{post_id}", headers=headers)
+    assert search(client, token, q="renamed").json() == []
+
+
+def test_search_blogs_quotes_query_syntax(client, category):
+    token = create_and_auth_user(client, "searchsyntax@example.com")
+    create_posts(client, token, category, 1, title="C++ tips")
+    res = search(client, token, q='c++ "tips" OR NEAR(')
+    assert res.status_code == 200
+
+
+def ndjson(*items):
+    return "".join(json.dumps(item) + "\n" for item in items)
+
+
+def test_import_blogs_in_batches(
+    client, category, query_counter, monkeypatch
+):
+    token = create_and_auth_user(client, "importer@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post = {
+        "content": "imported",
+        "category_id": category[0],
+        "sub_category_id": category[1],
+    }
+    body = ndjson(
+        dict(post, title="One"),
+        dict(post, title="Two", is_public=False),
+        {"title": "No content"},
+        dict(post, title="Three"),
+        dict(post, title="Wrong category", category_id=999),
+    ) + "{not json\n\n" + json.dumps(dict(post, title="Four"))
+
+    monkeypatch.setattr(blog, "POST_IMPORT_BATCH_SIZE", 2)
+    query_counter.clear()
+    res = client.post("/v1/blog/import", content=body, headers=headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["imported"] == 4
+    assert data["failed"] == 3
+    assert [error["line"] for error in data["errors"]] == [3, 5, 6]
+    assert data["errors"][0]["detail"].startswith("content:")
+    assert data["errors"][1]["detail"] == "Category doesn't match with id"
+    inserts = [s for s in query_counter if s.startswith("INSERT INTO posts")]
+    assert len(inserts) == 2
+
+    res = client.get("/v1/blog?fields=title", headers=headers)
+    titles = [item["title"] for item in res.json()]
+    assert sorted(titles) == ["Four", "One", "Three", "Two"]
+
+
+def test_import_blogs_requires_auth(client):
+    assert client.post("/v1/blog/import", content="").status_code == 401
+
+
+def test_export_blogs_streams_visible_posts(client, category, monkeypatch):
+    token = create_and_auth_user(client, "exporter@example.com")
+    other = create_and_auth_user(client, "otherexporter@example.com")
+    mine = create_posts(client, token, category, 3)
+    create_posts(client, other, category, 1, is_public=False)
+    public = create_posts(client, other, category, 1)
+
+    monkeypatch.setattr(blog, "POST_EXPORT_BATCH_SIZE", 2)
+    res = client.get(
+        "/v1/blog/export", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["id"] for row in rows] == mine + public
+    assert rows[0]["owner_id"] is not None
+    assert "created_at" in rows[0]
+
+    # An export can be imported again as is
+    res = client.post(
+        "/v1/blog/import",
+        content=res.text,
+        headers={"Authorization": f"Bearer {other}"},
+    )
+    assert res.json()["imported"] == 4
+
+
+def test_blog_writes_do_not_reload_row(client, category, query_counter):
+    token = create_and_auth_user(client, "noreload@example.com")
+    post_id = create_posts(client, token, category, 1)[0]
+
+    query_counter.clear()
+    res = client.post(
+        "/v1/blog",
+        json={
+            "title": "Fresh",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.json()["created_at"] and res.json()["id"] > post_id
+    assert query_counter[-1].startswith("INSERT INTO posts")
+
+    query_counter.clear()
+    res = client.put(
+        f"/v1/blog/{post_id}",
+        json={
+            "title": "Edited",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.json()["title"] == "Edited"
+    assert query_counter[-1].startswith("UPDATE posts")
+
+
+def test_patch_blog_single_update(client, category, query_counter):
+    token = create_and_auth_user(client, "patcher@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+    client.get(f"/v1/blog/{post_id}", headers=headers)
+
+    query_counter.clear()
+    res = client.patch(
+        f"/v1/blog/{post_id}", json={"title": "Patched"}, headers=headers
+    )
+    assert res.status_code == 200
+    assert res.json()["title"] == "Patched"
+    assert res.json()["description"] == "desc"
+    assert res.json()["category_id"] == category[0]
+    assert len(query_counter) == 1
+    assert query_counter[0].startswith("UPDATE posts")
+    assert "content" not in query_counter[0].split("WHERE")[0]
+
+    # The cached copy was invalidated
+    res = client.get(f"/v1/blog/{post_id}", headers=headers)
+    assert res.json()["title"] == "Patched"
+
+
+def test_patch_blog_not_owner(client, category):
+    owner = create_and_auth_user(client, "patchowner@example.com")
+    other = create_and_auth_user(client, "patchother@example.com")
+    post_id = create_posts(client, owner, category, 1)[0]
+    for target in (post_id, 9999):
+        res = client.patch(
+            f"/v1/blog/{target}",
+            json={"title": "Hijacked"},
+            headers={"Authorization": f"Bearer {other}"},
+        )
+        assert res.status_code == 403
+
+
+def test_patch_blog_validation(client, category):
+    token = create_and_auth_user(client, "patchvalid@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+    url = f"/v1/blog/{post_id}"
+    assert client.patch(url, json={}, headers=headers).status_code == 400
+    res = client.patch(url, json={"title": None}, headers=headers)
+    assert res.status_code == 422
+    res = client.patch(url, json={"category_id": 999}, headers=headers)
+    assert res.json()["detail"] == (
+        "category_id and sub_category_id must be changed together"
+    )
+    res = client.patch(
+        url,
+        json={"category_id": 999, "sub_category_id": category[1]},
+        headers=headers,
+    )
+    assert res.json()["detail"] == "Category doesn't match with id"
+    res = client.patch(url, json={"description": None}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["description"] is None
+
+
+def test_update_blog_keeps_403_before_validation(client, category):
+    owner = create_and_auth_user(client, "putowner@example.com")
+    other = create_and_auth_user(client, "putother@example.com")
+    post_id = create_posts(client, owner, category, 1)[0]
+    body = {
+        "title": "Bad",
+        "content": "content",
+        "category_id": 999,
+        "sub_category_id": category[1],
+    }
+    res = client.put(
+        f"/v1/blog/{post_id}",
+        json=body,
+        headers={"Authorization": f"Bearer {other}"},
+    )
+    assert res.status_code == 403
+    res = client.put(
+        f"/v1/blog/{post_id}",
+        json=body,
+        headers={"Authorization": f"Bearer {owner}"},
+    )
+    assert res.status_code == 400
+
+
+def test_delete_blog_without_loading_post(client, category, query_counter):
+    token = create_and_auth_user(client, "deleter@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_posts(client, token, category, 1)[0]
+    client.post(f"/v1/like/{post_id}", headers=headers)
+
+    query_counter.clear()
+    res = client.delete(f"/v1/blog/{post_id}", headers=headers)
+    assert res.json()["message"] == "Post deleted"
+    # Its likes go through ON DELETE CASCADE, not a statement of our own
+    assert [s.split()[0] for s in query_counter] == ["DELETE"]
+    res = client.get(f"/v1/likes?post_ids={post_id}", headers=headers)
+    assert res.json()["post_ids"] == []
+    res = client.delete(f"/v1/blog/{post_id}", headers=headers)
+    assert res.status_code == 403
+
+
+def test_delete_blogs_in_bulk(client, category, query_counter):
+    token = create_and_auth_user(client, "bulkdeleter@example.com")
+    other = create_and_auth_user(client, "bulkother@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    mine = create_posts(client, token, category, 3)
+    theirs = create_posts(client, other, category, 1)
+    client.post(f"/v1/like/{mine[0]}", headers=headers)
+
+    query_counter.clear()
+    res = client.request(
+        "DELETE",
+        "/v1/blog",
+        json={"post_ids": mine[:2] + theirs + [9999]},
+        headers=headers,
+    )
+    assert res.json() == {"message": "Posts deleted", "count": 2}
+    assert [s.split()[0] for s in query_counter] == ["DELETE"]
+    res = client.get(f"/v1/likes?post_ids={mine[0]}", headers=headers)
+    assert res.json()["post_ids"] == []
+    res = client.get("/v1/blog?fields=id", headers=headers)
+    assert sorted(item["id"] for item in res.json()) == [mine[2]] + theirs
@@ -0,0 +1,91 @@
+# tests/test_catalog.py
+from src import catalog as catalog_module
+from src.models import Category, SubCategory
+
+
+def auth_headers(client, email="catalog@example.com", password="catpass"):
+    client.post(
+        "/v1/accounts",
+        json={"name": "Catalog", "email": email, "password": password},
+    )
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": email, "password": password},
+    )
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def post_body(category_id, sub_category_id):
+    return {
+        "title": "Catalogued",
+        "content": "content",
+        "category_id": category_id,
+        "sub_category_id": sub_category_id,
+    }
+
+
+def add_category(run_db, name, sub_name):
+    async def seed(db):
+        cat = Category(name=name)
+        db.add(cat)
+        await db.flush()
+        sub_cat = SubCategory(name=sub_name, category_id=cat.id)
+        db.add(sub_cat)
+        await db.commit()
+        return cat.id, sub_cat.id
+
+    return run_db(seed)
+
+
+def test_create_blog_rejects_unknown_category(client, category):
+    headers = auth_headers(client)
+    res = client.post(
+        "/v1/blog", json=post_body(9999, category[1]), headers=headers
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Category doesn't match with id"
+
+    res = client.post(
+        "/v1/blog", json=post_body(category[0], 9999), headers=headers
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Sub Category doesn't match with id"
+
+
+def test_create_blog_rejects_foreign_sub_category(client, category, run_db):
+    headers = auth_headers(client)
+    _, other_sub_id = add_category(run_db, "Food", "Baking")
+    res = client.post(
+        "/v1/blog", json=post_body(category[0], other_sub_id), headers=headers
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Sub Category doesn't belong to Category"
+
+
+def test_names_filled_without_joins(client, category, query_counter):
+    headers = auth_headers(client)
+    post_id = client.post(
+        "/v1/blog", json=post_body(*category), headers=headers
+    ).json()["id"]
+
+    query_counter.clear()
+    item = client.get("/v1/blog", headers=headers).json()[0]
+    assert item["category_name"] == "Tech"
+    assert item["sub_category_name"] == "Python"
+    assert not any("JOIN" in statement for statement in query_counter)
+
+    res = client.get(f"/v1/blog/{post_id}", headers=headers)
+    assert res.json()["category_name"] == "Tech"
+    assert res.json()["sub_category_name"] == "Python"
+
+
+def test_catalog_reloads_on_miss(client, category, run_db, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_MISS_RELOAD_SECONDS", 0)
+    headers = auth_headers(client)
+    client.post("/v1/blog", json=post_body(*category), headers=headers)
+
+    new_category = add_category(run_db, "Travel", "Europe")
+    res = client.post(
+        "/v1/blog", json=post_body(*new_category), headers=headers
+    )
+    assert res.status_code == 200
@@ -0,0 +1,198 @@
+# tests/test_categories.py
+import pytest
+
+from src import auth
+from src.models import Category, Post
+def auth_headers(client, email="editor@example.com", password="editpass"):
+    client.post(
+        "/v1/accounts",
+        json={"name": "Editor", "email": email, "password": password},
+    )
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": email, "password": password},
+    )
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+@pytest.fixture
+def headers(client, monkeypatch):
+    """Headers of an account on the ADMIN_USER_IDS allow-list."""
+    headers = auth_headers(client)
+    user_id = client.get("/v1/me", headers=headers).json()["id"]
+    monkeypatch.setattr(auth, "ADMIN_USER_IDS", frozenset({user_id}))
+    return headers
+
+
+def test_category_crud(client, headers):
+    res = client.post("/v1/categories", json={"name": "News"}, headers=headers)
+    assert res.status_code == 200
+    category_id = res.json()["id"]
+
+    res = client.put(
+        f"/v1/categories/{category_id}",
+        json={"name": "World News"},
+        headers=headers,
+    )
+    assert res.json() == {"id": category_id, "name": "World News"}
+    res = client.get(f"/v1/categories/{category_id}")
+    assert res.json()["name"] == "World News"
+    assert {"id": category_id, "name": "World News"} in client.get(
+        "/v1/categories"
+    ).json()
+
+    res = client.delete(f"/v1/categories/{category_id}", headers=headers)
+    assert res.json()["message"] == "Category deleted"
+    assert client.get(f"/v1/categories/{category_id}").status_code == 404
+
+
+def test_category_writes_require_auth(client):
+    assert client.post("/v1/categories", json={"name": "x"}).status_code == 401
+
+
+def test_category_writes_require_admin(client, category, headers):
+    other = auth_headers(client, "reader@example.com", "readpass")
+    for method, url in (
+        ("POST", "/v1/categories"),
+        ("PUT", f"/v1/categories/{category[0]}"),
+        ("DELETE", f"/v1/categories/{category[0]}"),
+        ("POST", f"/v1/categories/{category[0]}/sub-categories"),
+        ("PUT", f"/v1/sub-categories/{category[1]}"),
+        ("DELETE", f"/v1/sub-categories/{category[1]}"),
+    ):
+        body = None if method == "DELETE" else {"name": "Defaced"}
+        res = client.request(method, url, json=body, headers=other)
+        assert res.status_code == 403
+        assert res.json()["detail"] == "Admin access required"
+    assert client.get(f"/v1/categories/{category[0]}").json()["name"] == "Tech"
+
+
+def test_sub_category_crud(client, category, headers):
+    res = client.post(
+        f"/v1/categories/{category[0]}/sub-categories",
+        json={"name": "Rust"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    sub_id = res.json()["id"]
+    assert res.json()["category_id"] == category[0]
+
+    res = client.put(
+        f"/v1/sub-categories/{sub_id}", json={"name": "Go"}, headers=headers
+    )
+    assert res.json()["name"] == "Go"
+
+    res = client.delete(f"/v1/sub-categories/{sub_id}", headers=headers)
+    assert res.json()["message"] == "Sub Category deleted"
+    res = client.delete(f"/v1/sub-categories/{sub_id}", headers=headers)
+    assert res.status_code == 404
+
+    res = client.post(
+        "/v1/categories/9999/sub-categories",
+        json={"name": "Orphan"},
+        headers=headers,
+    )
+    assert res.status_code == 404
+
+
+def test_delete_category_in_use(client, category, headers):
+    client.post(
+        "/v1/blog",
+        json={
+            "title": "Uses category",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    )
+    res = client.delete(f"/v1/categories/{category[0]}", headers=headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Category has posts"
+    res = client.delete(f"/v1/sub-categories/{category[1]}", headers=headers)
+    assert res.status_code == 400
+
+
+def test_delete_category_with_posts_under_its_sub_categories(
+    client, category, run_db, headers
+):
+    category_id, sub_category_id = category
+
+    async def file_elsewhere(db):
+        # Filed under this category's sub-category, but another category
+        other = Category(name="Other")
+        db.add(other)
+        await db.flush()
+        db.add(
+            Post(
+                title="Misfiled",
+                content="content",
+                category_id=other.id,
+                sub_category_id=sub_category_id,
+            )
+        )
+        await db.commit()
+
+    run_db(file_elsewhere)
+    res = client.delete(f"/v1/categories/{category_id}", headers=headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Category has posts"
+    assert client.get(f"/v1/categories/{category_id}").status_code == 200
+
+
+def test_category_tree_snapshot(client, category, query_counter, headers):
+    for is_public in (True, True, False):
+        client.post(
+            "/v1/blog",
+            json={
+                "title": "Counted",
+                "content": "content",
+                "is_public": is_public,
+                "category_id": category[0],
+                "sub_category_id": category[1],
+            },
+            headers=headers,
+        )
+    res = client.get("/v1/categories/tree")
+    assert res.json() == [
+        {
+            "id": category[0],
+            "name": "Tech",
+            "post_count": 2,
+            "sub_categories": [
+                {"id": category[1], "name": "Python", "post_count": 2}
+            ],
+        }
+    ]
+
+    query_counter.clear()
+    again = client.get("/v1/categories/tree")
+    assert again.json() == res.json()
+    assert query_counter == []
+
+    res = client.get(
+        "/v1/categories/tree", headers={"If-None-Match": again.headers["ETag"]}
+    )
+    assert res.status_code == 304
+
+
+def test_category_tree_invalidated_on_write(client, category, headers):
+    assert client.get("/v1/categories/tree").json()[0]["post_count"] == 0
+    client.post(
+        "/v1/blog",
+        json={
+            "title": "Fresh",
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers=headers,
+    )
+    assert client.get("/v1/categories/tree").json()[0]["post_count"] == 1
+
+    client.put(
+        f"/v1/categories/{category[0]}",
+        json={"name": "Technology"},
+        headers=headers,
+    )
+    assert client.get("/v1/categories/tree").json()[0]["name"] == "Technology"
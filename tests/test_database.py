@@ -1,14 +1,43 @@
 # tests/test_database.py
+import asyncio
+import subprocess
+import sys
 
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import database
 from src.database import get_db
+from src.main import create_app
+from tests.conftest import TEST_SETTINGS
 
 
 def test_get_db_lifecycle():
-    db_gen = get_db()
-    db = next(db_gen)
-    assert db is not None
-    assert db.is_active is True
-    try:
-        next(db_gen)  # Trigger finally block
-    except StopIteration:
-        pass
+    async def lifecycle():
+        database.init_engine(TEST_SETTINGS.database_url)
+        db_gen = get_db()
+        db = await db_gen.__anext__()
+        assert isinstance(db, AsyncSession)
+        assert db.is_active is True
+        with pytest.raises(StopAsyncIteration):
+            await db_gen.__anext__()  # Trigger session close
+        await database.dispose_engine()
+
+    asyncio.run(lifecycle())
+
+
+def test_importing_app_creates_no_engine():
+    code = "import src.main, src.database as d; print(d.async_engine)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert result.stdout.strip() == "None"
+
+
+def test_lifespan_owns_the_engine():
+    app = create_app(TEST_SETTINGS)
+    assert app.state.settings is TEST_SETTINGS
+    with TestClient(app):
+        assert str(database.async_engine.url) == TEST_SETTINGS.database_url
+    assert database.async_engine is None
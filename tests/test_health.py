@@ -0,0 +1,51 @@
+# tests/test_health.py
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import TimedAsyncQueuePool, pool_stats
+from src.metrics import Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 2.65
+
+
+def test_pool_stats_records_checkout_wait(tmp_path):
+    async def checkout():
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=TimedAsyncQueuePool,
+            pool_size=2,
+            max_overflow=0,
+        )
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            during = pool_stats(engine)
+        after = pool_stats(engine)
+        await engine.dispose()
+        return during, after
+
+    during, after = asyncio.run(checkout())
+    assert during["checked_out"] == 1
+    assert during["pool_size"] == 2
+    assert during["max_overflow"] == 0
+    assert after["checked_out"] == 0
+    assert after["checked_in"] == 1
+    assert after["timeouts"] == 0
+    assert after["wait_seconds"]["count"] == 1
+
+
+def test_db_pool_endpoint(client):
+    res = client.get("/v1/health/db-pool")
+    assert res.status_code == 200
+    body = res.json()
+    assert {"pool_size", "checked_out", "overflow"} <= set(body)
+    assert "+Inf" in body["wait_seconds"]["buckets"]
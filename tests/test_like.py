@@ -1,4 +1,12 @@
 # tests/test_like.py
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from src.models import Like, Post
+from src import response_cache
+
+
 def create_user_and_blog(
     client,
     email="liker@example.com",
@@ -130,3 +138,212 @@ def test_like_private_post_not_owner(client):
     assert (
         res.json()["detail"] == "You cannot like a private post you don't own"
     )
+
+
+def login(client, email, password="likepass"):
+    client.post(
+        "/v1/accounts",
+        json={"name": "Liker", "email": email, "password": password},
+    )
+    res = client.post(
+        "/v1/accounts/login",
+        data={"username": email, "password": password},
+    )
+    return res.json()["access_token"]
+
+
+def create_blog(client, token, category, title="Counted"):
+    res = client.post(
+        "/v1/blog",
+        json={
+            "title": title,
+            "content": "content",
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return res.json()["id"]
+
+
+def test_like_count_and_liked_by_me(client, category):
+    author = login(client, "counted-author@example.com")
+    fan = login(client, "counted-fan@example.com")
+    post_id = create_blog(client, author, category)
+    for token in (author, fan):
+        client.post(
+            f"/v1/like/{post_id}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    client.delete(
+        f"/v1/like/{post_id}",
+        headers={"Authorization": f"Bearer {author}"},
+    )
+    # Repeats are refused, and the counter change they made rolled back
+    res = client.delete(
+        f"/v1/like/{post_id}",
+        headers={"Authorization": f"Bearer {author}"},
+    )
+    assert res.status_code == 400
+    res = client.post(
+        f"/v1/like/{post_id}", headers={"Authorization": f"Bearer {fan}"}
+    )
+    assert res.status_code == 400
+
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {fan}"}
+    )
+    assert res.json()["like_count"] == 1
+    assert res.json()["liked_by_me"] is True
+
+    res = client.get(
+        "/v1/blog", headers={"Authorization": f"Bearer {author}"}
+    )
+    assert res.json()[0]["like_count"] == 1
+    assert res.json()[0]["liked_by_me"] is False
+
+
+def test_liked_by_me_batched_per_page(client, category, query_counter):
+    token = login(client, "batched@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def list_query_count():
+        client.get("/v1/blog", headers=headers)  # warm the user cache
+        client.portal.call(response_cache.post_cache.clear)
+        query_counter.clear()
+        res = client.get("/v1/blog", headers=headers)
+        assert all("liked_by_me" in item for item in res.json())
+        return len(query_counter)
+
+    post_id = create_blog(client, token, category)
+    client.post(f"/v1/like/{post_id}", headers=headers)
+    one_post = list_query_count()
+    for i in range(5):
+        create_blog(client, token, category, title=f"More {i}")
+    assert list_query_count() == one_post
+
+
+def test_like_is_two_statements(client, category, query_counter):
+    token = login(client, "statements@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_id = create_blog(client, token, category)
+    client.get("/v1/me", headers=headers)  # warm the user cache
+
+    query_counter.clear()
+    client.post(f"/v1/like/{post_id}", headers=headers)
+    # The post row is locked (by its counter update) before the like goes
+    # in, so concurrent likers can't deadlock on it
+    assert [s.split()[0] for s in query_counter] == ["UPDATE", "INSERT"]
+
+    query_counter.clear()
+    client.delete(f"/v1/like/{post_id}", headers=headers)
+    assert [s.split()[0] for s in query_counter] == ["UPDATE", "DELETE"]
+
+
+def test_concurrent_likes_do_not_duplicate(client, category, run_db):
+    clients, attempts_per_client = 8, 4
+    author = login(client, "stress-author@example.com")
+    post_id = create_blog(client, author, category)
+    tokens = [
+        login(client, f"stress{i}@example.com") for i in range(clients)
+    ]
+
+    def like(token):
+        return client.post(
+            f"/v1/like/{post_id}",
+            headers={"Authorization": f"Bearer {token}"},
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        statuses = list(pool.map(like, tokens * attempts_per_client))
+
+    assert statuses.count(200) == clients
+    assert statuses.count(400) == clients * (attempts_per_client - 1)
+
+    async def like_rows(db):
+        count = await db.scalar(
+            select(func.count()).select_from(Like).where(
+                Like.post_id == post_id
+            )
+        )
+        post = await db.get(Post, post_id)
+        return count, post.like_count
+
+    assert run_db(like_rows) == (clients, clients)
+
+
+def test_bulk_like_unlike_and_lookup(client, category):
+    author = login(client, "bulk-author@example.com")
+    fan = login(client, "bulk-fan@example.com")
+    headers = {"Authorization": f"Bearer {fan}"}
+    public_ids = [create_blog(client, author, category) for _ in range(3)]
+    private_id = client.post(
+        "/v1/blog",
+        json={
+            "title": "Hidden",
+            "content": "content",
+            "is_public": False,
+            "category_id": category[0],
+            "sub_category_id": category[1],
+        },
+        headers={"Authorization": f"Bearer {author}"},
+    ).json()["id"]
+    client.post(f"/v1/like/{public_ids[0]}", headers=headers)
+
+    res = client.post(
+        "/v1/likes",
+        json={"post_ids": public_ids + [private_id, 9999]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert res.json() == {"message": "Posts liked", "count": 2}
+
+    res = client.get(
+        "/v1/likes",
+        params={"post_ids": public_ids + [private_id]},
+        headers=headers,
+    )
+    assert res.json() == {"post_ids": public_ids}
+
+    res = client.request(
+        "DELETE",
+        "/v1/likes",
+        json={"post_ids": public_ids[:2]},
+        headers=headers,
+    )
+    assert res.json() == {"message": "Posts unliked", "count": 2}
+
+    counts = [
+        client.get(f"/v1/blog/{post_id}", headers=headers).json()[
+            "like_count"
+        ]
+        for post_id in public_ids
+    ]
+    assert counts == [0, 0, 1]
+
+
+def test_bulk_likes_lock_posts_first(client, category, query_counter):
+    token = login(client, "bulk-lock@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    post_ids = [create_blog(client, token, category) for _ in range(2)]
+    client.get("/v1/me", headers=headers)  # warm the user cache
+
+    for method, write in (("POST", "INSERT"), ("DELETE", "DELETE")):
+        query_counter.clear()
+        client.request(
+            method, "/v1/likes", json={"post_ids": post_ids}, headers=headers
+        )
+        assert [s.split()[0] for s in query_counter] == [
+            "SELECT", write, "UPDATE",
+        ]
+        assert "FROM posts" in query_counter[0]
+
+
+def test_bulk_like_rejects_oversized_batch(client):
+    token = login(client, "bulk-limit@example.com")
+    res = client.post(
+        "/v1/likes",
+        json={"post_ids": list(range(1, 102))},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 422
@@ -0,0 +1,72 @@
+# tests/test_metrics.py
+import asyncio
+import logging
+
+from src import middleware
+from src.metrics import (
+    current_query_stats,
+    http_request_db_queries,
+    http_request_n_plus_one,
+)
+from src.middleware import MetricsMiddleware
+
+
+def signup(client, email="metrics@example.com"):
+    return client.post(
+        "/v1/accounts",
+        json={"name": "Metrics", "email": email, "password": "pw"},
+    )
+
+
+def test_metrics_endpoint_reports_routes(client):
+    signup(client)
+    client.get("/v1/blog/12345")  # unauthenticated: 401
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = res.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert (
+        'http_request_duration_seconds_count{method="POST",'
+        'route="/v1/accounts",status="200"}'
+    ) in body
+    # Route templates, not raw paths, label the series
+    assert 'route="/v1/blog/{post_id}",status="401"' in body
+    assert "/v1/blog/12345" not in body
+    assert 'http_request_db_queries_bucket{method="POST"' in body
+    assert "db_pool_checked_out" in body
+    assert "db_pool_checkout_wait_seconds_bucket" in body
+
+
+def test_query_count_recorded_per_request(client):
+    before = http_request_db_queries.labels("POST", "/v1/accounts").snapshot()
+    signup(client, "counted@example.com")
+    after = http_request_db_queries.labels("POST", "/v1/accounts").snapshot()
+    assert after["count"] == before["count"] + 1
+    # Duplicate-email check plus the INSERT
+    assert after["sum"] == before["sum"] + 2
+
+
+def test_n_plus_one_flagged(monkeypatch, caplog):
+    monkeypatch.setattr(middleware, "N_PLUS_ONE_THRESHOLD", 3)
+
+    async def app(scope, receive, send):
+        for _ in range(5):
+            current_query_stats.get().record(
+                "SELECT * FROM likes WHERE post_id = ?", 0.001
+            )
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call():
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/loop"}
+        await MetricsMiddleware(app)(scope, None, send)
+
+    before = http_request_n_plus_one.value("GET", "unmatched")
+    with caplog.at_level(logging.WARNING, logger="src.middleware"):
+        asyncio.run(call())
+    assert http_request_n_plus_one.value("GET", "unmatched") == before + 1
+    assert "Possible N+1 queries on GET unmatched: 5 x" in caplog.text
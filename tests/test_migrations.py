@@ -0,0 +1,102 @@
+# tests/test_migrations.py
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from src.database import Base
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+
+def migrate(connection, revision="head", downgrade=False):
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    if downgrade:
+        command.downgrade(config, revision)
+    else:
+        command.upgrade(config, revision)
+
+
+def schema_diff(connection):
+    context = MigrationContext.configure(
+        connection,
+        opts={
+            "include_object": lambda obj, name, type_, *args: not (
+                type_ == "table" and name.startswith("posts_fts")
+            )
+        },
+    )
+    # The MySQL-only FULLTEXT index is never created on SQLite
+    return [
+        diff
+        for diff in compare_metadata(context, Base.metadata)
+        if not (diff[0] == "add_index" and diff[1].name == "ix_posts_fulltext")
+    ]
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        migrate(connection)
+        assert schema_diff(connection) == []
+        migrate(connection, "base", downgrade=True)
+        tables = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table'")
+        ).scalars()
+        assert set(tables) == {"alembic_version"}
+    engine.dispose()
+
+
+def test_migrations_upgrade_existing_data(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        # A database as the old create_all left it, duplicate like included
+        migrate(connection, "0001")
+        connection.execute(
+            text(
+                "INSERT INTO users (id, name, email, password) "
+                "VALUES (1, 'Old', 'old@example.com', 'x'), "
+                "(2, 'Gone', 'deleted-2@deleted.invalid', 'x')"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO posts (id, title, content, is_public, owner_id) "
+                "VALUES (1, 'Legacy searchable post', 'body', 1, 1)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO likes (user_id, post_id) "
+                "VALUES (1, 1), (1, 1), (NULL, 1)"
+            )
+        )
+        migrate(connection)
+
+        post = connection.execute(
+            text("SELECT like_count, updated_at FROM posts")
+        ).one()
+        assert post.like_count == 1
+        assert post.updated_at is not None
+        match = connection.execute(
+            text("SELECT rowid FROM posts_fts WHERE posts_fts MATCH 'legacy'")
+        ).scalars()
+        assert list(match) == [1]
+        # An account retired before 0005 is still marked for its purge
+        deleted = connection.execute(
+            text("SELECT id FROM users WHERE deleted_at IS NOT NULL")
+        ).scalars()
+        assert list(deleted) == [2]
+
+    with engine.begin() as connection:
+        # A fresh connection: SQLite ignores this inside a transaction
+        connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+        connection.execute(text("DELETE FROM users WHERE id = 1"))
+        assert connection.execute(
+            text("SELECT COUNT(*) FROM likes")
+        ).scalar() == 0
+    engine.dispose()
@@ -0,0 +1,124 @@
+# tests/test_ratelimit.py
+import asyncio
+
+import pytest
+
+from src import ratelimit
+from src.api.v1 import accounts
+from src.ratelimit import InMemoryRateLimitBackend, Rate, RateLimitBackend
+
+
+def register(client, email, password="limitpass"):
+    return client.post(
+        "/v1/accounts",
+        json={"name": "Limited", "email": email, "password": password},
+    )
+
+
+def login(client, email, password="limitpass"):
+    return client.post(
+        "/v1/accounts/login", data={"username": email, "password": password}
+    )
+
+
+def test_rate_parse():
+    assert Rate.parse("10/60") == Rate(10, 60.0)
+    assert Rate.parse("5") == Rate(5, 1.0)
+    assert Rate.parse("0") is None
+    assert Rate.parse("") is None
+    assert Rate(10, 60).refill_per_second == 10 / 60
+    for value in ("0/60", "5/0", "-1/60", "5/-1"):
+        with pytest.raises(ValueError):
+            Rate.parse(value)
+    with pytest.raises(ValueError):
+        ratelimit._parse_route_rates("GET /v1/blog=5/0")
+
+
+def test_token_bucket_drains_and_refills():
+    async def exercise():
+        backend = InMemoryRateLimitBackend()
+        rate = Rate(2, 0.05)
+        burst = [await backend.take("k", rate) for _ in range(3)]
+        await asyncio.sleep(0.03)
+        return burst, await backend.take("k", rate)
+
+    burst, after_refill = asyncio.run(exercise())
+    assert burst[:2] == [0.0, 0.0]
+    assert 0 < burst[2] <= 0.025
+    assert after_refill == 0.0
+
+
+def test_bucket_store_is_bounded():
+    async def fill():
+        backend = InMemoryRateLimitBackend(max_size=2)
+        for key in "abc":
+            await backend.take(key, Rate(1, 60))
+        return len(backend)
+
+    assert asyncio.run(fill()) == 2
+
+
+def test_partial_rate_limit_backend_cannot_be_created():
+    class TakeOnly(RateLimitBackend):
+        async def take(self, key, rate):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        TakeOnly()
+
+
+def test_login_throttled_per_account(client):
+    register(client, "victim@example.com")
+    for _ in range(accounts.RATE_LIMIT_LOGIN_PER_ACCOUNT.capacity):
+        assert login(client, "victim@example.com", "guess").status_code == 401
+
+    # Even the right password is turned away until the bucket refills
+    res = login(client, "Victim@example.com")
+    assert res.status_code == 429
+    assert res.json()["detail"] == "Too many requests"
+    assert int(res.headers["Retry-After"]) >= 1
+
+    # Other accounts behind the same IP are unaffected
+    register(client, "bystander@example.com")
+    assert login(client, "bystander@example.com").status_code == 200
+
+
+def test_login_throttled_per_ip(client, monkeypatch):
+    monkeypatch.setattr(accounts.login_ip_limit, "rate", Rate(2, 60))
+    assert login(client, "a@example.com").status_code == 401
+    assert login(client, "b@example.com").status_code == 401
+    assert login(client, "c@example.com").status_code == 429
+
+
+def test_register_throttled_per_ip(client, monkeypatch):
+    monkeypatch.setattr(accounts.register_ip_limit, "rate", Rate(1, 60))
+    assert register(client, "first@example.com").status_code == 200
+    res = register(client, "second@example.com")
+    assert res.status_code == 429
+    assert "Retry-After" in res.headers
+
+
+def test_route_limits(client, monkeypatch):
+    monkeypatch.setattr(
+        ratelimit,
+        "RATE_LIMIT_ROUTES",
+        {"GET /v1/health/db-pool": Rate(1, 60)},
+    )
+    assert client.get("/v1/health/db-pool").status_code == 200
+    assert client.get("/v1/health/db-pool").status_code == 429
+    # Routes without an override fall back to RATE_LIMIT_PER_ROUTE (off)
+    assert client.get("/v1/health/replicas").status_code == 200
+
+
+def test_rate_limits_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(accounts.login_ip_limit, "rate", Rate(1, 60))
+    for _ in range(3):
+        assert login(client, "nobody@example.com").status_code == 401
+
+
+def test_limits_start_fresh_with_each_app(client):
+    # The lifespan handler installs an empty backend for each app
+    assert len(ratelimit.rate_limit_backend) == 0
+    register(client, "fresh@example.com")
+    assert len(ratelimit.rate_limit_backend) == 1
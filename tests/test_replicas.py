@@ -0,0 +1,208 @@
+# tests/test_replicas.py
+import asyncio
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import database
+from src.database import Base, ReplicaSet
+from src.models import Post
+from src.main import create_app
+from tests.conftest import TEST_SETTINGS, reset_schema
+from tests.test_blog import create_and_auth_user
+
+
+@pytest.fixture(scope="function")
+def client(tmp_path):
+    # Two empty SQLite files stand in for replicas that haven't caught up
+    # with the primary, so a read shows where it was routed.
+    urls = tuple(
+        f"sqlite+aiosqlite:///{tmp_path / name}"
+        for name in ("replica1.db", "replica2.db")
+    )
+    settings = replace(TEST_SETTINGS, replica_urls=urls)
+
+    async def reset_schemas():
+        await reset_schema()
+        for engine in database.replicas.engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+    with TestClient(create_app(settings)) as client:
+        client.portal.call(reset_schemas)
+        yield client
+
+
+def down_engine(path):
+    """An engine whose every connection attempt fails, like a dead host."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    def refuse(dbapi_connection, connection_record):
+        raise ConnectionRefusedError("replica is down")
+
+    event.listen(engine.sync_engine, "connect", refuse)
+    return engine
+
+
+def test_replica_set_round_robin_skips_unhealthy(tmp_path):
+    async def picks():
+        engines = [
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}"),
+            down_engine(tmp_path / "b.db"),
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'c.db'}"),
+        ]
+        replica_set = ReplicaSet(engines)
+        await replica_set.check()
+        picked = [await replica_set.pick() for _ in range(4)]
+        healthy = list(replica_set.healthy)
+        await replica_set.dispose()
+        return engines, picked, healthy
+
+    engines, picked, healthy = asyncio.run(picks())
+    assert healthy == [True, False, True]
+    assert picked == [engines[0], engines[2], engines[0], engines[2]]
+
+
+def test_replica_set_without_healthy_replicas(tmp_path):
+    async def pick():
+        replica_set = ReplicaSet([down_engine(tmp_path / "a.db")])
+        await replica_set.check()
+        picked = await replica_set.pick()
+        await replica_set.dispose()
+        return picked
+
+    assert asyncio.run(pick()) is None
+
+
+def test_health_checks_run_in_the_background(tmp_path):
+    async def watch():
+        replica_set = ReplicaSet(
+            [down_engine(tmp_path / "a.db")], check_interval=0.01
+        )
+        # Until the first check, replicas are assumed healthy; picking
+        # never runs a check itself
+        assert await replica_set.pick() is replica_set.engines[0]
+        assert replica_set.checked_at is None
+
+        replica_set.start_health_checks()
+        await asyncio.sleep(0.05)
+        first_check = replica_set.checked_at
+        await asyncio.sleep(0.05)
+        picked = await replica_set.pick()
+        checked_again = replica_set.checked_at > first_check
+        await replica_set.dispose()
+        return picked, checked_again, replica_set._checker
+
+    picked, checked_again, checker = asyncio.run(watch())
+    assert picked is None
+    assert checked_again
+    assert checker is None
+
+
+def test_reads_alternate_between_replicas(client):
+    async def route():
+        return [await database.get_read_engine() for _ in range(4)]
+
+    engines = client.portal.call(route)
+    replica1, replica2 = database.replicas.engines
+    assert engines == [replica1, replica2, replica1, replica2]
+
+
+def test_read_after_write_goes_to_primary(client, category):
+    category_id, sub_category_id = category
+    token = create_and_auth_user(client)
+    other = create_and_auth_user(client, "other@example.com", "otherpass")
+    created = client.post(
+        "/v1/blog",
+        json={
+            "title": "Draft",
+            "description": "Not replicated yet",
+            "content": "Body",
+            "is_public": False,
+            "category_id": category_id,
+            "sub_category_id": sub_category_id,
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    post_id = created.json()["id"]
+
+    # The author just wrote, so they read their post from the primary
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200
+    assert res.json()["title"] == "Draft"
+
+    # Everybody else reads from a replica, which doesn't have it yet
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {other}"}
+    )
+    assert res.status_code == 404
+
+    # Once the read-your-writes window has passed, so does the author
+    client.portal.call(database.recent_writes.clear)
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 404
+
+
+def test_cache_filled_from_replica_keeps_read_your_writes(client, category):
+    category_id, sub_category_id = category
+    author = create_and_auth_user(client)
+    reader = create_and_auth_user(client, "reader@example.com", "readpass")
+    headers = {"Authorization": f"Bearer {author}"}
+    post_id = client.post(
+        "/v1/blog",
+        json={
+            "title": "Old",
+            "content": "Body",
+            "category_id": category_id,
+            "sub_category_id": sub_category_id,
+        },
+        headers=headers,
+    ).json()["id"]
+
+    async def replicate():
+        async with database.get_engine().connect() as conn:
+            row = (
+                await conn.execute(select(Post).where(Post.id == post_id))
+            ).mappings().one()
+        for engine in database.replicas.engines:
+            async with engine.begin() as conn:
+                # The replicas hold only the post, not its users or
+                # categories
+                await conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+                await conn.execute(insert(Post), [dict(row)])
+        await database.recent_writes.clear()
+
+    client.portal.call(replicate)
+    client.patch(f"/v1/blog/{post_id}", json={"title": "New"}, headers=headers)
+
+    # Another user's read comes from a replica that hasn't caught up, and
+    # is cached under the key the write just invalidated
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {reader}"}
+    )
+    assert res.json()["title"] == "Old"
+    # The author still sees their own write...
+    for path in (f"/v1/blog/{post_id}", "/v1/blog"):
+        res = client.get(path, headers=headers)
+        body = res.json()
+        assert (body if isinstance(body, dict) else body[0])["title"] == "New"
+    # ...and their read from the primary put it back into the cache
+    client.portal.call(database.recent_writes.clear)
+    res = client.get(
+        f"/v1/blog/{post_id}", headers={"Authorization": f"Bearer {reader}"}
+    )
+    assert res.json()["title"] == "New"
+
+
+def test_replicas_health_endpoint(client):
+    client.portal.call(database.replicas.check)
+    body = client.get("/v1/health/replicas").json()
+    assert [replica["healthy"] for replica in body] == [True, True]
+    assert body[0]["url"].endswith("replica1.db")